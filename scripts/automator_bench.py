@@ -0,0 +1,479 @@
+#!/usr/bin/env python3
+"""
+OFFLINE AUTOMATOR BENCHMARK
+Runs ColabMinecraftAutomator against a scripted fake WebDriver and a fake clock,
+reporting wall time, simulated time, WebDriver calls, bytes and peak memory.
+With --live, launches a real Chrome through each driver backend (selenium, cdp)
+and compares per-call latency and browser memory side by side.
+"""
+
+import argparse
+import base64
+import json
+import logging
+import os
+import struct
+import sys
+import tempfile
+import time
+import tracemalloc
+import zlib
+from collections import Counter
+from unittest import mock
+
+import procfs
+from colab_probe import PROBE_SCRIPT, probe_runtime
+from locators import FIND_SCRIPT
+from my_colab_automation import DRIVER_BACKENDS, ColabMinecraftAutomator
+
+COLAB_URL = "https://colab.research.google.com/drive/bench"
+LOGIN_URL = "https://accounts.google.com/ServiceLogin?continue=colab"
+# Window size the automator launches Chrome with
+VIEWPORT = (1920, 1080)
+
+
+class FakeClock:
+    """Simulated time; sleep() advances it instantly"""
+
+    def __init__(self, start=1_700_000_000.0):
+        self.start = start
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.start + self.now
+
+    def sleep(self, seconds):
+        self.now += max(0.0, seconds)
+
+
+class Stats:
+    """WebDriver call counts and payload bytes, shared by every fake driver instance"""
+
+    def __init__(self):
+        self.calls = Counter()
+        self.bytes = 0
+        self.launches = 0
+
+    def record(self, name, result):
+        self.calls[name] += 1
+        if isinstance(result, (bytes, str)):
+            self.bytes += len(result)
+        elif result is not None:
+            self.bytes += len(json.dumps(result, default=str))
+        return result
+
+
+def _gray_png(shade, width, height):
+    """Flat gray PNG of the given size, so the screenshot store can hash it"""
+    raw = (b'\x00' + bytes([shade]) * width) * height
+
+    def chunk(kind, body):
+        return struct.pack('>I', len(body)) + kind + body + struct.pack('>I', zlib.crc32(kind + body))
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 0, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(raw)) + chunk(b'IEND', b''))
+
+
+class FakeElement:
+    def __init__(self, driver, action):
+        self.driver = driver
+        self.action = action
+
+    def click(self):
+        self.driver.stats.record('click', None)
+        self.driver.clock.sleep(self.driver.latency)
+        self.action()
+
+    def send_keys(self, *keys):
+        self.driver.stats.record('send_keys', None)
+
+
+class FakeProcess:
+    def __init__(self):
+        self.pid = os.getpid()
+        self.exited = False
+
+    def poll(self):
+        return 0 if self.exited else None
+
+
+class FakeService:
+    def __init__(self):
+        self.process = FakeProcess()
+
+
+class FakeSwitchTo:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def new_window(self, kind='tab'):
+        self.driver.stats.record('new_window', None)
+        self.driver.handles.append(f"tab-{len(self.driver.handles)}")
+        self.driver.handle = self.driver.handles[-1]
+        self.driver.state = 'blank'
+
+    def window(self, handle):
+        self.driver.stats.record('switch_window', None)
+        self.driver.handle = handle
+
+
+class FakeDriver:
+    """
+    Scripted Colab tab. `scenario` is the state the notebook comes up in:
+    idle (Connect), connected, disconnected (Reconnect) or login (redirect).
+    Clicking Connect/Run all moves to connecting, then connected after connect_delay.
+    """
+
+    def __init__(self, clock, stats, scenario='idle', latency=0.005, load_delay=2.0,
+                 connect_delay=6.0, page_bytes=3_000_000):
+        self.clock = clock
+        self.stats = stats
+        self.scenario = scenario
+        self.latency = latency
+        self.load_delay = load_delay
+        self.connect_delay = connect_delay
+        self.page_bytes = page_bytes
+        self.state = 'blank'
+        self.url = 'about:blank'
+        self.loaded_at = 0.0
+        self.connected_at = None
+        self.handles = ['tab-0']
+        self.handle = 'tab-0'
+        self.service = FakeService()
+        self.switch_to = FakeSwitchTo(self)
+
+    # -- helpers
+    def _tick(self):
+        self.clock.sleep(self.latency)
+
+    def _current_state(self):
+        if self.state == 'connecting' and self.clock.now >= self.connected_at:
+            self.state = 'connected'
+        return self.state
+
+    def _start_connecting(self):
+        if self._current_state() in ('idle', 'disconnected'):
+            self.state = 'connecting'
+            self.connected_at = self.clock.now + self.connect_delay
+
+    # -- navigation
+    def get(self, url):
+        self._tick()
+        self.stats.record('get', None)
+        if self.scenario == 'login':
+            self.url, self.state = LOGIN_URL, 'login'
+        else:
+            self.url = url
+            self.state = self.scenario if 'colab' in url else 'other'
+        self.loaded_at = self.clock.now + self.load_delay
+
+    def refresh(self):
+        self.get(self.url)
+
+    @property
+    def current_url(self):
+        return self.stats.record('current_url', self.url)
+
+    @property
+    def current_window_handle(self):
+        return self.handle
+
+    @property
+    def window_handles(self):
+        return list(self.handles)
+
+    @property
+    def page_source(self):
+        self._tick()
+        return self.stats.record('page_source', 'x' * self.page_bytes)
+
+    def close(self):
+        self.stats.record('close', None)
+        self.handles.remove(self.handle)
+
+    def quit(self):
+        self.stats.record('quit', None)
+        self.service.process.exited = True
+
+    # -- scripting
+    def execute_script(self, script, *args):
+        self._tick()
+        if script == FIND_SCRIPT:
+            selectors, preferred = args
+            order = list(range(len(selectors)))
+            if preferred >= 0:
+                order.remove(preferred)
+                order.insert(0, preferred)
+            for i in order:
+                found = self._match(selectors[i])
+                if found:
+                    return self.stats.record('execute_script', [i, found[0]])
+            return self.stats.record('execute_script', [-1, None])
+        if script != PROBE_SCRIPT:
+            return self.stats.record('execute_script', None)
+        loaded = self.clock.now >= self.loaded_at
+        state = self._current_state()
+        label = {'idle': 'Connect', 'connecting': 'Connecting', 'connected': 'RAM Disk',
+                 'disconnected': 'Reconnect'}.get(state, '')
+        result = {
+            'url': self.url,
+            'ready': 'complete' if loaded else 'loading',
+            'has_widget': loaded and bool(label),
+            'label': label if loaded else '',
+            'usage': loaded and state == 'connected',
+            'dialog': 'Runtime disconnected' if loaded and state == 'disconnected' else '',
+            'login_form': state == 'login',
+            'sign_in_link': False,
+        }
+        return self.stats.record('execute_script', result)
+
+    def _match(self, selector):
+        if self.clock.now < self.loaded_at:
+            return []
+        state = self._current_state()
+        if 'Run all' in selector and state in ('idle', 'disconnected', 'connected'):
+            return [FakeElement(self, self._start_connecting)]
+        # Only the aria-label variant exists in this fake page
+        if "'Connect'" in selector and '@aria-label' in selector and state == 'idle':
+            return [FakeElement(self, self._start_connecting)]
+        return []
+
+    def find_elements(self, by, selector):
+        self._tick()
+        self.stats.record('find_elements', None)
+        return self._match(selector)
+
+    def find_element(self, by, selector):
+        self._tick()
+        self.stats.record('find_element', None)
+        return FakeElement(self, lambda: None)
+
+    # -- DevTools / cookies / screenshots
+    def execute_cdp_cmd(self, cmd, params):
+        self._tick()
+        if cmd == 'Page.getLayoutMetrics':
+            result = {'cssLayoutViewport': {'clientWidth': VIEWPORT[0], 'clientHeight': VIEWPORT[1]}}
+        elif cmd == 'Page.captureScreenshot':
+            # Same state -> same pixels, so the store's dedup can kick in
+            shade = {'connected': 40, 'disconnected': 200}.get(self._current_state(), 120)
+            # Like Chrome: the clip times its scale, floored
+            clip = params.get('clip') or {'width': VIEWPORT[0], 'height': VIEWPORT[1], 'scale': 1}
+            size = [max(1, int(clip[side] * clip.get('scale', 1))) for side in ('width', 'height')]
+            result = {'data': base64.b64encode(_gray_png(shade, *size)).decode()}
+        elif cmd == 'Network.getAllCookies':
+            result = {'cookies': []}
+        elif cmd == 'Performance.getMetrics':
+            # The heap grows by 1 MB per simulated minute since the last load
+            heap = 50_000_000 + int(max(0.0, self.clock.now - self.loaded_at) / 60 * 1_000_000)
+            result = {'metrics': [{'name': 'JSHeapUsedSize', 'value': heap}]}
+        else:
+            result = {}
+        return self.stats.record(f'cdp:{cmd}', result)
+
+    def get_screenshot_as_png(self):
+        self._tick()
+        return self.stats.record('screenshot', _gray_png(0, *VIEWPORT))
+
+    def get_cookies(self):
+        return self.stats.record('get_cookies', [])
+
+    def add_cookie(self, cookie):
+        self._tick()
+        self.stats.record('add_cookie', None)
+
+
+def build(scenario, clock, stats, workdir, **driver_kwargs):
+    """Automator wired to a fake driver; relaunches get a fresh fake of the same scenario"""
+    def factory(options=None):
+        stats.launches += 1
+        return FakeDriver(clock, stats, scenario, **driver_kwargs)
+
+    automator = ColabMinecraftAutomator(
+        browser_profile='standard', driver=factory(), driver_factory=factory, log_dir=workdir)
+    automator.colab_url = COLAB_URL
+    automator.user_data_dir = os.path.join(workdir, 'chrome-profile')
+    automator.cookies.path = os.path.join(workdir, 'cookies.json')
+    automator.cookies.legacy_pickle = None
+    # start() would otherwise never return
+    automator.keep_alive_loop = lambda: None
+    return automator
+
+
+def _check_loop(automator, n=20):
+    return all(automator.check_runtime_status() for _ in range(n))
+
+
+def _memory_recycle(automator):
+    # A day-old tab whose JS heap is far past a 100 MB limit: expect one reload
+    automator.scheduler = automator.build_scheduler()
+    automator.memory.heap_limit = 100_000_000
+    automator.memory.rss_limit = float('inf')
+    automator.driver.loaded_at -= 24 * 3600
+    automator.memory_check_tick()
+    return automator.memory.recycles['reload'] == 1 and automator.memory.last_after.js_heap < 100_000_000
+
+
+def _screenshot_dedup(automator):
+    # Five captures of an unchanged page: the first is stored, the rest are duplicates
+    for _ in range(5):
+        automator.take_screenshot('bench')
+    return automator.screenshots.skipped_duplicates == 4 and len(automator.screenshots.entries) == 1
+
+
+def _break_tab_then_recover(automator):
+    # Simulate the tab dropping its runtime before recovery kicks in
+    automator.driver.state = 'disconnected'
+    return automator.recover()
+
+
+# name -> (initial notebook state, action, expected result)
+SCENARIOS = {
+    'cold_start': ('idle', lambda a: a.start(), True),
+    'check_connected': ('connected', _check_loop, True),
+    'check_disconnected': ('disconnected', lambda a: a.check_runtime_status(), False),
+    'reconnect': ('disconnected', lambda a: a.connect_to_runtime(), True),
+    'login_redirect': ('login', lambda a: a.start(), False),
+    'recover': ('connected', _break_tab_then_recover, True),
+    'screenshot_dedup': ('connected', _screenshot_dedup, True),
+    'memory_recycle': ('connected', _memory_recycle, True),
+}
+
+
+def run_scenario(name, **driver_kwargs):
+    initial, action, expected = SCENARIOS[name]
+    clock = FakeClock()
+    stats = Stats()
+    with tempfile.TemporaryDirectory() as workdir, \
+            mock.patch.object(time, 'sleep', clock.sleep), \
+            mock.patch.object(time, 'monotonic', clock.monotonic), \
+            mock.patch.object(time, 'time', clock.time):
+        automator = build(initial, clock, stats, workdir, **driver_kwargs)
+        if initial != 'login':
+            automator.driver.get(COLAB_URL)
+            clock.sleep(automator.driver.load_delay)
+        stats.calls.clear()
+        stats.bytes = 0
+        sim_start = clock.now
+
+        tracemalloc.start()
+        wall_start = time.perf_counter()
+        result = action(automator)
+        wall = time.perf_counter() - wall_start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        "scenario": name,
+        "result": result if not isinstance(result, list) else len(result),
+        "ok": result == expected,
+        "wall_ms": round(wall * 1000, 2),
+        "simulated_s": round(clock.now - sim_start, 2),
+        "webdriver_calls": sum(stats.calls.values()),
+        "bytes": stats.bytes,
+        "peak_kb": round(peak / 1024, 1),
+        "launches": stats.launches - 1,
+        "calls": dict(stats.calls),
+    }
+
+
+def print_table(rows):
+    header = f"{'scenario':<20}{'ok':>4}{'wall ms':>10}{'sim s':>9}{'calls':>7}{'bytes':>10}{'peak KB':>10}"
+    print(header)
+    print('-' * len(header))
+    for r in rows:
+        print(f"{r['scenario']:<20}{'✓' if r['ok'] else '✗':>4}{r['wall_ms']:>10}{r['simulated_s']:>9}"
+              f"{r['webdriver_calls']:>7}{r['bytes']:>10}{r['peak_kb']:>10}")
+
+
+# Served to the real browser in --live mode; has a Connect button for the locator lookups
+LIVE_PAGE = "data:text/html,<colab-connect-button></colab-connect-button><span>Connect</span>"
+LIVE_COMMANDS = ('execute_script', 'execute_cdp_cmd', 'get_cookies', 'current_url')
+
+
+def run_live(backend, iterations):
+    """Launch a real browser through `backend` and time the calls the keep-alive loop makes"""
+    with tempfile.TemporaryDirectory() as workdir:
+        # A placeholder driver skips the automatic launch, so the profile dir can point at workdir
+        automator = ColabMinecraftAutomator(browser_profile='low', driver=object(), log_dir=workdir,
+                                            backend=backend)
+        automator.user_data_dir = os.path.join(workdir, 'chrome-profile')
+        automator.driver_stats.commands.clear()
+        begin = time.perf_counter()
+        if not automator.setup_browser(load_cookies=False):
+            return {"backend": backend, "ok": False}
+        launch = time.perf_counter() - begin
+        driver = automator.driver
+        try:
+            driver.get(LIVE_PAGE)
+            automator.driver_stats.commands.clear()
+            for _ in range(iterations):
+                probe_runtime(driver)
+                automator.locators.find(driver, 'connect_button')
+                driver.execute_cdp_cmd('Page.captureScreenshot', {'format': 'webp', 'quality': 50})
+                driver.get_cookies()
+                driver.current_url
+            rss = procfs.tree_rss(driver.service.process.pid)
+            latency = {}
+            for (command, _), s in automator.driver_stats.commands.items():
+                total, count = latency.get(command, (0.0, 0))
+                latency[command] = (total + s.seconds, count + s.count)
+        finally:
+            driver.quit()
+    return {
+        "backend": backend,
+        "ok": True,
+        "launch_s": round(launch, 2),
+        # chromedriver is Chrome's parent, so its tree includes the browser
+        "rss_mb": round(rss / 1048576, 1),
+        "avg_ms": {command: round(total / count * 1000, 2) for command, (total, count) in latency.items()},
+    }
+
+
+def print_live(rows):
+    header = f"{'backend':<10}{'launch s':>10}{'RSS MB':>9}" + ''.join(f"{c:>17}" for c in LIVE_COMMANDS)
+    print(header)
+    print('-' * len(header))
+    for r in rows:
+        if not r["ok"]:
+            print(f"{r['backend']:<10}  failed to launch")
+            continue
+        print(f"{r['backend']:<10}{r['launch_s']:>10}{r['rss_mb']:>9}"
+              + ''.join(f"{r['avg_ms'].get(c, '-'):>17}" for c in LIVE_COMMANDS))
+    print("(per-call averages in ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the automator against a fake WebDriver")
+    parser.add_argument('scenarios', nargs='*', default=list(SCENARIOS), help="scenarios to run")
+    parser.add_argument('--json', action='store_true', help="print JSON instead of a table")
+    parser.add_argument('--latency', type=float, default=0.005, help="simulated seconds per WebDriver call")
+    parser.add_argument('-v', '--verbose', action='store_true', help="show automator logs")
+    parser.add_argument('--live', action='store_true',
+                        help="compare the driver backends against a real Chrome instead")
+    parser.add_argument('--iterations', type=int, default=50, help="calls per command in --live mode")
+    args = parser.parse_args()
+
+    if args.live:
+        logging.basicConfig(level=logging.INFO if args.verbose else logging.CRITICAL,
+                            format='%(levelname)s - %(message)s')
+        rows = [run_live(backend, args.iterations) for backend in DRIVER_BACKENDS]
+        if args.json:
+            print(json.dumps(rows, indent=2))
+        else:
+            print_live(rows)
+        sys.exit(0 if all(r["ok"] for r in rows) else 1)
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.CRITICAL,
+                        format='%(levelname)s - %(message)s')
+    rows = [run_scenario(name, latency=args.latency) for name in args.scenarios]
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print_table(rows)
+    sys.exit(0 if all(r["ok"] for r in rows) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,537 @@
+#!/usr/bin/env python3
+"""
+DEVTOOLS PROTOCOL DRIVER
+Talks to Chrome over its DevTools websocket directly, without chromedriver.
+Implements the part of Selenium's WebDriver interface the automator uses, so
+it can be passed anywhere a webdriver.Chrome is expected.
+"""
+
+import base64
+import collections
+import hashlib
+import json
+import os
+import select
+import shutil
+import socket
+import struct
+import subprocess
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+from urllib.parse import urlsplit
+
+PAGE_LOAD_TIMEOUT = 60.0
+LAUNCH_TIMEOUT = 30.0
+CHROME_BINARIES = ('chromium', 'chromium-browser', 'google-chrome', 'google-chrome-stable', 'chrome')
+WS_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+# selenium.webdriver.common.keys.Keys code points -> (DOM key, virtual key code)
+KEYS = {
+    '\ue004': ('Tab', 9),
+    '\ue007': ('Enter', 13),
+    '\ue00e': ('PageUp', 33),
+    '\ue00f': ('PageDown', 34),
+    '\ue012': ('ArrowLeft', 37),
+    '\ue013': ('ArrowUp', 38),
+    '\ue014': ('ArrowRight', 39),
+    '\ue015': ('ArrowDown', 40),
+}
+
+# Wraps a WebDriver-style script body. Elements cross the boundary as
+# {"__cdp_element__": n}, an index into a per-page array.
+SCRIPT_WRAPPER = """(() => {
+  let store = window.__cdpElements;
+  if (!store || store.length > 1000) store = window.__cdpElements = [];
+  const decode = (v) => {
+    if (Array.isArray(v)) return v.map(decode);
+    if (v && typeof v === 'object') {
+      if ('__cdp_element__' in v) return store[v.__cdp_element__];
+      return Object.fromEntries(Object.entries(v).map(([k, x]) => [k, decode(x)]));
+    }
+    return v;
+  };
+  const encode = (v) => {
+    if (v instanceof Element) {
+      let i = store.indexOf(v);
+      if (i < 0) i = store.push(v) - 1;
+      return {__cdp_element__: i};
+    }
+    if (Array.isArray(v) || v instanceof NodeList || v instanceof HTMLCollection) return Array.from(v, encode);
+    if (v && typeof v === 'object' && Object.getPrototypeOf(v) === Object.prototype) {
+      return Object.fromEntries(Object.entries(v).map(([k, x]) => [k, encode(x)]));
+    }
+    return v;
+  };
+  return encode((function() { %s }).apply(null, decode(%s)));
+})()"""
+
+FIND_SCRIPT = """
+const [by, value, all] = arguments;
+let found = [];
+if (by === 'xpath') {
+  const r = document.evaluate(value, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+  for (let i = 0; i < r.snapshotLength && (all || i < 1); i++) found.push(r.snapshotItem(i));
+} else if (by === 'tag name') {
+  found = Array.from(document.getElementsByTagName(value));
+} else if (by === 'id') {
+  found = [document.getElementById(value)].filter(Boolean);
+} else {
+  found = all ? Array.from(document.querySelectorAll(value)) : [document.querySelector(value)].filter(Boolean);
+}
+return all ? found : found.slice(0, 1);
+"""
+
+
+class CdpError(Exception):
+    pass
+
+
+class CdpTimeout(CdpError):
+    pass
+
+
+class WebSocket:
+    """
+    Minimal RFC 6455 client: text frames out, reassembled text messages in.
+    The socket stays blocking and deadlines are enforced with select(), so a
+    timeout never leaves half a frame consumed: bytes wait in our own buffer
+    until a whole frame is there.
+    """
+
+    def __init__(self, url, timeout=30.0):
+        parts = urlsplit(url)
+        self.sock = socket.create_connection((parts.hostname, parts.port or 80), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.settimeout(None)
+        self.buffer = bytearray()
+        self.chunk = bytearray(65536)
+        self.message = bytearray()   # fragments of a message still being received
+        key = base64.b64encode(os.urandom(16)).decode()
+        self.sock.sendall((
+            f"GET {parts.path or '/'} HTTP/1.1\r\n"
+            f"Host: {parts.hostname}:{parts.port}\r\n"
+            "Upgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n"
+        ).encode())
+        deadline = time.monotonic() + timeout
+        while b'\r\n\r\n' not in self.buffer:
+            self._fill(deadline)
+        end = self.buffer.index(b'\r\n\r\n')
+        status, *lines = bytes(self.buffer[:end]).split(b'\r\n')
+        # Anything after the headers is already websocket frames (e.g. a ping)
+        del self.buffer[:end + 4]
+        headers = {}
+        for line in lines:
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        expected = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+        if b' 101 ' not in status or headers.get('sec-websocket-accept') != expected:
+            self.sock.close()
+            raise CdpError(f"websocket handshake failed: {status.decode(errors='replace').strip()}")
+
+    def _send_frame(self, opcode, payload):
+        n = len(payload)
+        header = bytearray([0x80 | opcode])
+        if n < 126:
+            header.append(0x80 | n)
+        elif n < 65536:
+            header.append(0x80 | 126)
+            header += struct.pack('>H', n)
+        else:
+            header.append(0x80 | 127)
+            header += struct.pack('>Q', n)
+        mask = os.urandom(4)
+        header += mask
+        if n:
+            # XOR the whole payload at once through big ints instead of byte by byte
+            key = (mask * (n // 4 + 1))[:n]
+            payload = (int.from_bytes(payload, 'big') ^ int.from_bytes(key, 'big')).to_bytes(n, 'big')
+        self.sock.sendall(bytes(header) + payload)
+
+    def _fill(self, deadline):
+        """Append whatever the socket has to the buffer, waiting until deadline (None: forever)"""
+        remaining = None if deadline is None else deadline - time.monotonic()
+        if remaining is not None and remaining <= 0:
+            raise CdpTimeout("websocket read timed out")
+        ready, _, _ = select.select([self.sock], [], [], remaining)
+        if not ready:
+            raise CdpTimeout("websocket read timed out")
+        n = self.sock.recv_into(self.chunk)
+        if not n:
+            raise CdpError("websocket closed")
+        self.buffer += memoryview(self.chunk)[:n]
+
+    def _frame(self):
+        """Pop one complete frame off the buffer as (fin, opcode, payload), or None"""
+        buf = self.buffer
+        if len(buf) < 2:
+            return None
+        b0, b1 = buf[0], buf[1]
+        n, offset = b1 & 0x7F, 2
+        if n == 126:
+            if len(buf) < 4:
+                return None
+            n, offset = struct.unpack_from('>H', buf, 2)[0], 4
+        elif n == 127:
+            if len(buf) < 10:
+                return None
+            n, offset = struct.unpack_from('>Q', buf, 2)[0], 10
+        mask = None
+        if b1 & 0x80:
+            if len(buf) < offset + 4:
+                return None
+            mask, offset = bytes(buf[offset:offset + 4]), offset + 4
+        if len(buf) < offset + n:
+            return None
+        data = bytes(buf[offset:offset + n])
+        del buf[:offset + n]
+        if mask and n:
+            key = (mask * (n // 4 + 1))[:n]
+            data = (int.from_bytes(data, 'big') ^ int.from_bytes(key, 'big')).to_bytes(n, 'big')
+        return b0 & 0x80, b0 & 0x0F, data
+
+    def send(self, text):
+        self._send_frame(0x1, text.encode())
+
+    def recv(self, deadline=None):
+        """Next text message; CdpTimeout at deadline (time.monotonic()), with nothing lost"""
+        while True:
+            frame = self._frame()
+            if frame is None:
+                self._fill(deadline)
+                continue
+            fin, opcode, data = frame
+            if opcode == 0x8:
+                raise CdpError("websocket closed by browser")
+            if opcode == 0x9:
+                self._send_frame(0xA, data)
+                continue
+            if opcode == 0xA:
+                continue
+            self.message += data
+            if fin:
+                message, self.message = self.message, bytearray()
+                return message.decode()
+
+    def close(self):
+        try:
+            self._send_frame(0x8, b'')
+        except OSError:
+            pass
+        self.sock.close()
+
+
+class CdpConnection:
+    """
+    Request/response over one browser websocket; events are kept in a small
+    backlog. A command that gets no reply in time, or a socket error, marks
+    the connection dead: later commands fail at once, so recovery relaunches
+    the browser instead of retrying on a hung one.
+    """
+
+    def __init__(self, url, timeout=30.0):
+        self.ws = WebSocket(url, timeout)
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.last_id = 0
+        self.events = collections.deque(maxlen=200)
+        self.dead = None   # why the connection can no longer be used
+
+    def _recv(self, deadline):
+        try:
+            return json.loads(self.ws.recv(deadline))
+        except CdpTimeout:
+            raise
+        except (CdpError, OSError, ValueError) as e:
+            self.dead = str(e) or type(e).__name__
+            raise CdpError(f"DevTools connection lost: {self.dead}")
+
+    def send(self, method, params=None, session_id=None):
+        with self.lock:
+            if self.dead:
+                raise CdpError(f"{method}: DevTools connection is dead ({self.dead})")
+            self.last_id += 1
+            message = {"id": self.last_id, "method": method, "params": params or {}}
+            if session_id:
+                message["sessionId"] = session_id
+            try:
+                self.ws.send(json.dumps(message))
+            except OSError as e:
+                self.dead = str(e)
+                raise CdpError(f"{method}: DevTools connection lost: {e}")
+            deadline = time.monotonic() + self.timeout
+            while True:
+                try:
+                    reply = self._recv(deadline)
+                except CdpTimeout:
+                    self.dead = f"no reply to {method} within {self.timeout:.0f}s"
+                    raise CdpError(f"{method}: {self.dead}")
+                if "method" in reply:
+                    self.events.append(reply)
+                    continue
+                if reply.get("id") != self.last_id:
+                    continue
+                if "error" in reply:
+                    raise CdpError(f"{method}: {reply['error'].get('message')}")
+                return reply.get("result", {})
+
+    def wait_event(self, method, session_id, timeout):
+        """Wait for an event, checking what already arrived during earlier commands.
+        A missing event (e.g. a slow page load) raises CdpTimeout; the connection stays usable."""
+        deadline = time.monotonic() + timeout
+        with self.lock:
+            if self.dead:
+                raise CdpError(f"{method}: DevTools connection is dead ({self.dead})")
+            while True:
+                for event in self.events:
+                    if event["method"] == method and event.get("sessionId") == session_id:
+                        self.events.remove(event)
+                        return event.get("params", {})
+                try:
+                    reply = self._recv(deadline)
+                except CdpTimeout:
+                    raise CdpTimeout(f"timed out waiting for {method}")
+                if "method" in reply:
+                    self.events.append(reply)
+
+    def drop_events(self, method, session_id):
+        with self.lock:
+            for event in [e for e in self.events if e["method"] == method and e.get("sessionId") == session_id]:
+                self.events.remove(event)
+
+    def close(self):
+        self.ws.close()
+
+
+class CdpElement:
+    def __init__(self, driver, handle, index):
+        self.driver = driver
+        self.handle = handle
+        self.index = index
+
+    def click(self):
+        """Real mouse press/release at the element's centre, like WebDriver's click"""
+        x, y = self.driver.execute_script(
+            "const el = arguments[0]; el.scrollIntoView({block: 'center', inline: 'center'});"
+            "const r = el.getBoundingClientRect(); return [r.left + r.width / 2, r.top + r.height / 2];", self)
+        for kind in ('mouseMoved', 'mousePressed', 'mouseReleased'):
+            self.driver.execute_cdp_cmd('Input.dispatchMouseEvent', {
+                'type': kind, 'x': x, 'y': y, 'button': 'left', 'clickCount': 1})
+
+    def send_keys(self, *keys):
+        self.driver.execute_script("arguments[0].focus();", self)
+        for text in keys:
+            for char in text:
+                if char in KEYS:
+                    key, code = KEYS[char]
+                    for kind in ('rawKeyDown', 'keyUp'):
+                        self.driver.execute_cdp_cmd('Input.dispatchKeyEvent', {
+                            'type': kind, 'key': key, 'code': key, 'windowsVirtualKeyCode': code})
+                else:
+                    self.driver.execute_cdp_cmd('Input.insertText', {'text': char})
+
+
+class CdpSwitchTo:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def new_window(self, kind='tab'):
+        target = self.driver.conn.send('Target.createTarget', {'url': 'about:blank', 'newWindow': kind == 'window'})
+        self.driver._attach(target['targetId'])
+
+    def window(self, handle):
+        if handle in self.driver.sessions:
+            self.driver.handle = handle
+        else:
+            self.driver._attach(handle)
+
+
+def find_chrome():
+    binary = os.environ.get('CHROME_BIN')
+    if binary:
+        return binary
+    for name in CHROME_BINARIES:
+        path = shutil.which(name)
+        if path:
+            return path
+    raise CdpError("no Chrome/Chromium binary found (set CHROME_BIN)")
+
+
+class CdpDriver:
+    """
+    Launches Chrome with --remote-debugging-port=0 and drives it over DevTools.
+    Accepts selenium Options (only the command-line arguments are used; prefs
+    need chromedriver) or a plain list of arguments.
+    """
+
+    def __init__(self, options=None, binary=None, launch_timeout=LAUNCH_TIMEOUT):
+        args = list(getattr(options, 'arguments', None) or options or [])
+        args = [a for a in args if not a.startswith('--remote-debugging')]
+        user_data_dir = next((a.split('=', 1)[1] for a in args if a.startswith('--user-data-dir=')), None)
+        if user_data_dir is None:
+            user_data_dir = tempfile.mkdtemp(prefix='cdp-profile-')
+            args.append(f'--user-data-dir={user_data_dir}')
+        port_file = os.path.join(user_data_dir, 'DevToolsActivePort')
+        try:
+            os.unlink(port_file)
+        except OSError:
+            pass
+
+        process = subprocess.Popen([binary or find_chrome(), *args, '--remote-debugging-port=0', 'about:blank'],
+                                   stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        # Same shape as webdriver.Chrome().service.process, for RSS accounting and shutdown waits
+        self.service = SimpleNamespace(process=process)
+        deadline = time.monotonic() + launch_timeout
+        lines = []
+        while len(lines) < 2:
+            if process.poll() is not None:
+                raise CdpError(f"Chrome exited with {process.returncode} during startup")
+            if time.monotonic() > deadline:
+                process.kill()
+                raise CdpError("Chrome did not open a DevTools port in time")
+            try:
+                with open(port_file) as f:
+                    lines = f.read().split()
+            except OSError:
+                pass
+            if len(lines) < 2:
+                time.sleep(0.05)
+
+        self.conn = CdpConnection(f"ws://127.0.0.1:{lines[0]}{lines[1]}", timeout=PAGE_LOAD_TIMEOUT)
+        self.sessions = {}
+        self.handle = None
+        self.switch_to = CdpSwitchTo(self)
+        pages = [t for t in self.conn.send('Target.getTargets')['targetInfos'] if t['type'] == 'page']
+        if pages:
+            self._attach(pages[0]['targetId'])
+        else:
+            self.switch_to.new_window('tab')
+
+    # ------------------------------------------------------------- plumbing
+    def _attach(self, target_id):
+        session = self.conn.send('Target.attachToTarget', {'targetId': target_id, 'flatten': True})['sessionId']
+        self.sessions[target_id] = session
+        self.handle = target_id
+        self.execute_cdp_cmd('Page.enable', {})
+
+    def execute_cdp_cmd(self, cmd, params):
+        return self.conn.send(cmd, params, self.sessions[self.handle])
+
+    def _evaluate(self, expression):
+        result = self.execute_cdp_cmd('Runtime.evaluate', {
+            'expression': expression, 'returnByValue': True, 'awaitPromise': True})
+        if 'exceptionDetails' in result:
+            details = result['exceptionDetails']
+            message = details.get('exception', {}).get('description') or details.get('text')
+            raise CdpError(f"javascript error: {message}")
+        return result['result'].get('value')
+
+    def _wait_for_load(self, timeout=PAGE_LOAD_TIMEOUT):
+        self.conn.wait_event('Page.loadEventFired', self.sessions[self.handle], timeout)
+
+    # ----------------------------------------------------------- navigation
+    def get(self, url):
+        self.conn.drop_events('Page.loadEventFired', self.sessions[self.handle])
+        result = self.execute_cdp_cmd('Page.navigate', {'url': url})
+        if result.get('errorText'):
+            raise CdpError(f"navigation to {url} failed: {result['errorText']}")
+        self._wait_for_load()
+
+    def refresh(self):
+        self.conn.drop_events('Page.loadEventFired', self.sessions[self.handle])
+        self.execute_cdp_cmd('Page.reload', {})
+        self._wait_for_load()
+
+    @property
+    def current_url(self):
+        return self._evaluate('location.href')
+
+    @property
+    def page_source(self):
+        return self._evaluate('document.documentElement.outerHTML')
+
+    @property
+    def current_window_handle(self):
+        return self.handle
+
+    @property
+    def window_handles(self):
+        return [t['targetId'] for t in self.conn.send('Target.getTargets')['targetInfos'] if t['type'] == 'page']
+
+    def close(self):
+        self.conn.send('Target.closeTarget', {'targetId': self.handle})
+        self.sessions.pop(self.handle, None)
+
+    def quit(self):
+        try:
+            self.conn.send('Browser.close')
+        except (CdpError, OSError):
+            pass
+        try:
+            self.conn.close()
+        except OSError:
+            pass
+        try:
+            self.service.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.service.process.kill()
+            self.service.process.wait()
+
+    # ------------------------------------------------------------ scripting
+    def _encode(self, value):
+        if isinstance(value, CdpElement):
+            return {"__cdp_element__": value.index}
+        if isinstance(value, (list, tuple)):
+            return [self._encode(v) for v in value]
+        if isinstance(value, dict):
+            return {k: self._encode(v) for k, v in value.items()}
+        return value
+
+    def _decode(self, value):
+        if isinstance(value, list):
+            return [self._decode(v) for v in value]
+        if isinstance(value, dict):
+            if '__cdp_element__' in value:
+                return CdpElement(self, self.handle, value['__cdp_element__'])
+            return {k: self._decode(v) for k, v in value.items()}
+        return value
+
+    def execute_script(self, script, *args):
+        expression = SCRIPT_WRAPPER % (script, json.dumps(self._encode(list(args))))
+        return self._decode(self._evaluate(expression))
+
+    def find_elements(self, by, value):
+        return self.execute_script(FIND_SCRIPT, by, value, True)
+
+    def find_element(self, by, value):
+        found = self.execute_script(FIND_SCRIPT, by, value, False)
+        if not found:
+            raise CdpError(f"no such element: {by}={value}")
+        return found[0]
+
+    # ------------------------------------------------- cookies / screenshots
+    def get_cookies(self):
+        cookies = []
+        for c in self.execute_cdp_cmd('Network.getAllCookies', {})['cookies']:
+            cookie = {k: c[k] for k in ('name', 'value', 'domain', 'path', 'secure', 'httpOnly') if k in c}
+            if c.get('sameSite'):
+                cookie['sameSite'] = c['sameSite']
+            if not c.get('session') and c.get('expires', -1) > 0:
+                cookie['expiry'] = int(c['expires'])
+            cookies.append(cookie)
+        return cookies
+
+    def add_cookie(self, cookie):
+        params = {k: cookie[k] for k in ('name', 'value', 'domain', 'path', 'secure', 'httpOnly', 'sameSite')
+                  if k in cookie}
+        if 'expiry' in cookie:
+            params['expires'] = cookie['expiry']
+        if 'domain' not in params:
+            params['url'] = self.current_url
+        if not self.execute_cdp_cmd('Network.setCookie', params).get('success', True):
+            raise CdpError(f"cookie rejected: {cookie.get('name')}")
+
+    def get_screenshot_as_png(self):
+        return base64.b64decode(self.execute_cdp_cmd('Page.captureScreenshot', {'format': 'png'})['data'])
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+COLAB STATE PROBE
+Read runtime/login state with one small execute_script call instead of page_source
+"""
+
+# Runs in the page and returns a handful of short strings/booleans.
+# Colab renders the runtime widget as <colab-connect-button> with a shadow root;
+# its label reads "Connect", "Connecting", "Reconnect" or shows RAM/Disk bars.
+PROBE_SCRIPT = """
+const clip = (s) => (s || '').replace(/\\s+/g, ' ').trim().slice(0, 80);
+const widget = document.querySelector('colab-connect-button');
+const root = widget && (widget.shadowRoot || widget);
+const button = root && root.querySelector('#connect, colab-toolbar-button, button');
+const usage = !!(root && root.querySelector('colab-usage-display, .ram, [class*="usage"]'));
+let dialog = '';
+for (const d of document.querySelectorAll('mwc-dialog[open], paper-dialog[opened], md-dialog[open]')) {
+  dialog = clip(d.innerText);
+  break;
+}
+return {
+  url: location.href,
+  ready: document.readyState,
+  has_widget: !!widget,
+  label: clip(button ? button.innerText || button.textContent : root ? root.textContent : ''),
+  usage: usage,
+  dialog: dialog,
+  login_form: !!document.querySelector('input[type="email"], #identifierId'),
+  sign_in_link: !!document.querySelector('a[href*="ServiceLogin"], a[href*="accounts.google.com/signin"]'),
+};
+"""
+
+
+class RuntimeStatus:
+    """Compact view of what the Colab page is showing"""
+
+    CONNECTED = 'connected'
+    CONNECTING = 'connecting'
+    IDLE = 'idle'                    # "Connect" button, never connected
+    DISCONNECTED = 'disconnected'    # "Reconnect" button or disconnect dialog
+    LOGIN_REQUIRED = 'login_required'
+    UNKNOWN = 'unknown'
+
+    def __init__(self, state, label='', url='', dialog='', ready='', has_widget=False):
+        self.state = state
+        self.label = label
+        self.url = url
+        self.dialog = dialog
+        self.ready = ready
+        self.has_widget = has_widget
+
+    @property
+    def connected(self):
+        return self.state == self.CONNECTED
+
+    @property
+    def logged_in(self):
+        return self.state != self.LOGIN_REQUIRED
+
+    @property
+    def settled(self):
+        """Page finished loading and the runtime widget shows a final state"""
+        if self.state == self.LOGIN_REQUIRED:
+            return True
+        return self.ready == 'complete' and self.state not in (self.CONNECTING, self.UNKNOWN)
+
+    @classmethod
+    def from_probe(cls, raw):
+        raw = raw or {}
+        url = raw.get('url', '')
+        label = raw.get('label', '')
+        dialog = raw.get('dialog', '')
+        text = label.lower()
+
+        if 'accounts.google.com' in url or raw.get('login_form') or raw.get('sign_in_link'):
+            state = cls.LOGIN_REQUIRED
+        # Before the CONNECTED test: 'connected' is a substring of 'disconnected'
+        elif 'reconnect' in text or 'disconnected' in text or 'disconnected' in dialog.lower():
+            state = cls.DISCONNECTED
+        elif any(word in text for word in ('connecting', 'allocating', 'initializing')):
+            state = cls.CONNECTING
+        elif raw.get('usage') or 'connected' in text or ('ram' in text and 'disk' in text):
+            state = cls.CONNECTED
+        elif text.startswith('connect'):
+            state = cls.IDLE
+        else:
+            state = cls.UNKNOWN
+        return cls(state, label=label, url=url, dialog=dialog,
+                   ready=raw.get('ready', ''), has_widget=bool(raw.get('has_widget')))
+
+    def as_dict(self):
+        return {"state": self.state, "label": self.label, "dialog": self.dialog, "url": self.url}
+
+    def __repr__(self):
+        return f"RuntimeStatus({self.state!r}, label={self.label!r})"
+
+
+def probe_runtime(driver):
+    """Single round trip returning a RuntimeStatus for the current page"""
+    return RuntimeStatus.from_probe(driver.execute_script(PROBE_SCRIPT))
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+SHARED CONFIGURATION
+Typed settings for my_colab_automation.py, manual_login.py and health-server.py.
+Defaults are overridden by the config file, then by environment variables.
+The file is YAML (needs PyYAML) or, for any other extension, KEY=value lines:
+
+    # /home/coder/colab.yaml
+    colab_url: https://colab.research.google.com/drive/...
+    runtime_check_interval: 180
+    chrome_rss_limit_mb: 900
+
+SIGHUP or saving the file reloads it. Fields marked live take effect in the
+running process; the rest are reported and wait for the next restart.
+"""
+
+import ctypes
+import logging
+import os
+import select
+import signal
+import struct
+import threading
+import time
+
+DEFAULT_PATH = os.environ.get('COLAB_CONFIG', '/home/coder/colab.yaml')
+
+# name: (type, default, environment variable, live, allowed values or minimum)
+FIELDS = {
+    # Automator
+    'colab_url': (str, "https://colab.research.google.com/drive/1jckV8xUJSmLhhol6wZwVJzpybsimiRw1",
+                  'COLAB_URL', False, None),
+    'log_dir': (str, '/home/coder/logs', 'COLAB_LOG_DIR', False, None),
+    'cookie_file': (str, '/home/coder/.cookies/google_cookies.json', 'COLAB_COOKIE_FILE', False, None),
+    'user_data_dir': (str, '/home/coder/.chrome-profile', 'COLAB_USER_DATA_DIR', False, None),
+    'browser_profile': (str, 'low', 'COLAB_BROWSER_PROFILE', False, ('standard', 'low')),
+    'driver_backend': (str, 'selenium', 'COLAB_DRIVER_BACKEND', False, ('selenium', 'cdp')),
+    'driver_stats': (bool, True, 'COLAB_DRIVER_STATS', False, None),
+    # Keep-alive cadence (seconds); the next run is interval + uniform(0, jitter)
+    'activity_interval': (float, 60.0, 'COLAB_ACTIVITY_INTERVAL', True, 1.0),
+    'activity_jitter': (float, 120.0, 'COLAB_ACTIVITY_JITTER', True, 0.0),
+    'runtime_check_interval': (float, 300.0, 'COLAB_RUNTIME_CHECK_INTERVAL', True, 1.0),
+    'screenshot_interval': (float, 1800.0, 'COLAB_SCREENSHOT_INTERVAL', True, 1.0),
+    'refresh_interval': (float, 3600.0, 'COLAB_REFRESH_INTERVAL', True, 60.0),
+    'refresh_jitter': (float, 1800.0, 'COLAB_REFRESH_JITTER', True, 0.0),
+    'memory_check_interval': (float, 120.0, 'COLAB_MEMORY_CHECK_INTERVAL', True, 1.0),
+    # Chrome memory budget (memory_watchdog.py)
+    'chrome_rss_limit_mb': (float, 1024.0, 'CHROME_RSS_LIMIT_MB', True, 1.0),
+    'chrome_heap_limit_mb': (float, 384.0, 'CHROME_HEAP_LIMIT_MB', True, 1.0),
+    'chrome_recycle_cooldown': (float, 1800.0, 'CHROME_RECYCLE_COOLDOWN', True, 0.0),
+    # Shutdown and warm start (seconds)
+    'shutdown_deadline': (float, 8.0, 'COLAB_SHUTDOWN_DEADLINE', True, 0.5),
+    'warm_start_max_age': (float, 900.0, 'COLAB_WARM_START_MAX_AGE', True, 0.0),
+    # Health server
+    'health_port': (int, 8081, 'HEALTH_PORT', False, 1),
+    'health_sample_interval': (float, 5.0, 'HEALTH_SAMPLE_INTERVAL', True, 0.5),
+    'metrics_sample_interval': (float, 15.0, 'METRICS_SAMPLE_INTERVAL', True, 0.5),
+    'events_index_interval': (float, 10.0, 'EVENTS_INDEX_INTERVAL', True, 0.5),
+}
+
+# <sys/inotify.h>
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_TO = 0x080
+IN_EVENT = struct.Struct('iIII')
+
+
+class ConfigError(ValueError):
+    pass
+
+
+def parse_value(name, raw):
+    """Coerce a file/env value to the field's type and check its bounds"""
+    kind, _, _, _, allowed = FIELDS[name]
+    try:
+        if kind is bool:
+            if isinstance(raw, bool):
+                value = raw
+            elif str(raw).strip().lower() in ('1', 'true', 'yes', 'on'):
+                value = True
+            elif str(raw).strip().lower() in ('0', 'false', 'no', 'off'):
+                value = False
+            else:
+                raise ValueError(raw)
+        elif kind is int and isinstance(raw, float) and not raw.is_integer():
+            raise ValueError(raw)
+        else:
+            value = kind(raw.strip() if isinstance(raw, str) else raw)
+    except (TypeError, ValueError):
+        raise ConfigError(f"{name}: expected {kind.__name__}, got {raw!r}")
+    if isinstance(allowed, tuple) and value not in allowed:
+        raise ConfigError(f"{name}: {value!r} is not one of {', '.join(allowed)}")
+    if kind in (int, float) and allowed is not None and value < allowed:
+        raise ConfigError(f"{name}: {value} is below the minimum of {allowed}")
+    return value
+
+
+def read_file(path):
+    """Raw {field: value} from a YAML or KEY=value file; {} if it does not exist"""
+    try:
+        with open(path) as f:
+            text = f.read()
+    except FileNotFoundError:
+        return {}
+    except OSError as e:
+        raise ConfigError(f"cannot read {path}: {e}")
+    if path.endswith(('.yaml', '.yml')):
+        try:
+            import yaml
+        except ImportError:
+            raise ConfigError(f"{path}: PyYAML is not installed; use a KEY=value file instead")
+        try:
+            data = yaml.safe_load(text)
+        except yaml.YAMLError as e:
+            raise ConfigError(f"{path}: {e}")
+        if data is None:
+            return {}
+        if not isinstance(data, dict):
+            raise ConfigError(f"{path}: expected a mapping at the top level")
+        return data
+    # Env file: field names or their environment variable names
+    by_env = {spec[2]: name for name, spec in FIELDS.items()}
+    data = {}
+    for number, line in enumerate(text.splitlines(), 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        key, sep, value = line.partition('=')
+        if not sep:
+            raise ConfigError(f"{path}:{number}: expected KEY=value")
+        key = key.strip()
+        if key.startswith('export '):
+            key = key[len('export '):].strip()
+        data[by_env.get(key, key.lower())] = value.strip().strip('"\'')
+    return data
+
+
+def load(path=DEFAULT_PATH, environ=None):
+    """Validated {field: value}; raises ConfigError listing every bad field"""
+    environ = os.environ if environ is None else environ
+    raw = read_file(path)
+    errors = [f"unknown field: {name}" for name in raw if name not in FIELDS]
+    values = {}
+    for name, (kind, default, env, _, _) in FIELDS.items():
+        value = environ.get(env, raw.get(name, default))
+        try:
+            values[name] = parse_value(name, value)
+        except ConfigError as e:
+            errors.append(str(e))
+    if errors:
+        raise ConfigError(f"{path}: " + '; '.join(errors))
+    return values
+
+
+class Config:
+    """Current settings as attributes; reload() swaps them and notifies listeners"""
+
+    def __init__(self, path=DEFAULT_PATH, environ=None):
+        self.path = path
+        self.environ = environ
+        self.lock = threading.Lock()
+        self.listeners = []
+        self.values = load(path, environ)
+
+    def __getattr__(self, name):
+        try:
+            return self.__dict__['values'][name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def on_change(self, func):
+        """func(changes) with changes = {field: (old, new)}, called from the reloading thread"""
+        self.listeners.append(func)
+
+    def reload(self):
+        """Re-read the file; a bad file is logged and the current values are kept"""
+        with self.lock:
+            try:
+                values = load(self.path, self.environ)
+            except ConfigError as e:
+                logging.error(f"❌ Config not reloaded: {e}")
+                return {}
+            changes = {name: (self.values[name], value) for name, value in values.items()
+                       if value != self.values[name]}
+            self.values = values
+        if not changes:
+            logging.info(f"⚙ Config reloaded from {self.path}, nothing changed")
+            return changes
+        summary = ', '.join(f"{name} {old!r} -> {new!r}" for name, (old, new) in changes.items())
+        logging.info(f"⚙ Config reloaded: {summary}", extra={"event": "config_reload"})
+        pending = [name for name in changes if not FIELDS[name][3]]
+        if pending:
+            logging.warning(f"⚠ Config changes that need a restart: {', '.join(pending)}")
+        for func in self.listeners:
+            try:
+                func(changes)
+            except Exception as e:
+                logging.warning(f"⚠ Config listener failed: {e}")
+        return changes
+
+    def watch(self):
+        """SIGHUP and writes to the file trigger reload(); call from the main thread"""
+        # Reload off the signal handler: listeners take locks the main thread may hold
+        signal.signal(signal.SIGHUP, lambda *_: threading.Thread(target=self.reload, daemon=True).start())
+        try:
+            fd = self._inotify()
+        except OSError as e:
+            logging.debug(f"inotify unavailable ({e}), config reloads on SIGHUP only")
+            return
+        threading.Thread(target=self._follow, args=(fd,), daemon=True).start()
+
+    def _inotify(self):
+        # Watch the directory: editors and `mv` replace the file instead of writing it
+        libc = ctypes.CDLL(None, use_errno=True)
+        fd = libc.inotify_init1(os.O_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        directory = os.path.dirname(os.path.abspath(self.path))
+        if libc.inotify_add_watch(fd, directory.encode(), IN_CLOSE_WRITE | IN_MOVED_TO) < 0:
+            errno = ctypes.get_errno()
+            os.close(fd)
+            raise OSError(errno, f'cannot watch {directory}')
+        return fd
+
+    def _follow(self, fd):
+        target = os.path.basename(self.path).encode()
+        while True:
+            data = os.read(fd, 4096)
+            offset, hit = 0, False
+            while offset < len(data):
+                _, _, _, length = IN_EVENT.unpack_from(data, offset)
+                offset += IN_EVENT.size
+                name = data[offset:offset + length].rstrip(b'\0')
+                offset += length
+                hit = hit or name == target
+            if hit:
+                # Let a burst of writes settle and drop their events, then reload once
+                time.sleep(0.2)
+                while select.select([fd], [], [], 0)[0]:
+                    os.read(fd, 4096)
+                self.reload()
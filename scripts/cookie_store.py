@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+COOKIE STORE
+Domain-indexed JSON cookie file shared by the automator and the login tool
+"""
+
+import json
+import logging
+import os
+import pickle
+import time
+
+DEFAULT_PATH = '/home/coder/.cookies/google_cookies.json'
+LEGACY_PICKLE = '/home/coder/.cookies/google_cookies.pkl'
+
+# Any of these on .google.com means a signed-in Google session
+SESSION_COOKIES = ('SID', '__Secure-1PSID', '__Secure-3PSID')
+
+FIELDS = ('name', 'value', 'domain', 'path', 'secure', 'httpOnly', 'sameSite')
+
+
+def normalize(cookie):
+    """Selenium or DevTools cookie dict -> storage format (DevTools field names)"""
+    out = {k: cookie[k] for k in FIELDS if cookie.get(k) is not None}
+    out.setdefault('path', '/')
+    # Selenium says "expiry", DevTools says "expires" (-1 for session cookies)
+    expires = cookie.get('expires', cookie.get('expiry'))
+    if expires is not None and expires >= 0:
+        out['expires'] = expires
+    return out
+
+
+def to_cdp(cookie):
+    """Storage format -> Network.CookieParam"""
+    param = dict(cookie)
+    domain = param.get('domain', '')
+    if not domain.startswith('.'):
+        # Host-only cookie: a domain would widen it to subdomains, and Chrome
+        # rejects __Host- cookies that carry one. Address it by URL instead.
+        del param['domain']
+        param['url'] = f"https://{domain}{param.get('path', '/')}"
+    return param
+
+
+class CookieStore:
+    """Cookies on disk as {"domains": {domain: [cookie, ...]}}"""
+
+    def __init__(self, path=DEFAULT_PATH, legacy_pickle=LEGACY_PICKLE):
+        self.path = path
+        self.legacy_pickle = legacy_pickle
+        self.stats = {"loaded": 0, "skipped": 0, "expired": 0}
+
+    def exists(self):
+        return os.path.exists(self.path) or bool(self.legacy_pickle and os.path.exists(self.legacy_pickle))
+
+    def load(self):
+        """Return {domain: [cookie, ...]}, migrating the old pickle file once"""
+        try:
+            with open(self.path) as f:
+                return json.load(f).get("domains", {})
+        except FileNotFoundError:
+            pass
+        except ValueError as e:
+            logging.warning(f"⚠ Cookie file {self.path} is corrupt: {e}")
+            return {}
+
+        if self.legacy_pickle and os.path.exists(self.legacy_pickle):
+            with open(self.legacy_pickle, 'rb') as f:
+                cookies = pickle.load(f)
+            self.save(cookies)
+            logging.info(f"✅ Migrated {len(cookies)} cookies from {self.legacy_pickle}")
+            return self.index(cookies)
+        return {}
+
+    @staticmethod
+    def index(cookies):
+        domains = {}
+        for cookie in cookies:
+            cookie = normalize(cookie)
+            domains.setdefault(cookie.get('domain', ''), []).append(cookie)
+        return domains
+
+    def save(self, cookies):
+        """Atomically write cookies grouped by domain"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        payload = {"version": 1, "saved_at": time.time(), "domains": self.index(cookies)}
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(payload, f)
+        os.chmod(tmp, 0o600)
+        os.replace(tmp, self.path)
+        return sum(len(v) for v in payload["domains"].values())
+
+    def save_from(self, driver):
+        """Capture every cookie in the browser, not just the current page's domain"""
+        try:
+            cookies = driver.execute_cdp_cmd('Network.getAllCookies', {})['cookies']
+        except Exception:
+            cookies = driver.get_cookies()
+        return self.save(cookies)
+
+    def saved_at(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f).get("saved_at")
+        except (OSError, ValueError):
+            return None
+
+    def inject(self, driver, now=None):
+        """
+        Put stored cookies into the browser with one Network.setCookies call
+        per domain. Works before any navigation. Returns load/skip/expiry counts.
+        """
+        now = time.time() if now is None else now
+        self.stats = {"loaded": 0, "skipped": 0, "expired": 0}
+
+        for domain, cookies in self.load().items():
+            live = []
+            for cookie in cookies:
+                if 'expires' in cookie and cookie['expires'] < now:
+                    self.stats["expired"] += 1
+                elif not cookie.get('name') or not domain:
+                    self.stats["skipped"] += 1
+                else:
+                    live.append(cookie)
+            if not live:
+                continue
+            params = [to_cdp(cookie) for cookie in live]
+            try:
+                driver.execute_cdp_cmd('Network.setCookies', {'cookies': params})
+                self.stats["loaded"] += len(live)
+            except Exception as e:
+                logging.debug(f"Bulk cookie load failed for {domain}: {e}")
+                self._inject_one_by_one(driver, params)
+        return self.stats
+
+    def _inject_one_by_one(self, driver, params):
+        """One rejected cookie fails the whole batch; retry each on its own (also before navigation)"""
+        for param in params:
+            try:
+                result = driver.execute_cdp_cmd('Network.setCookie', param)
+            except Exception as e:
+                logging.debug(f"Cookie {param.get('name')} rejected: {e}")
+                result = {"success": False}
+            # Older Chrome reports success, newer raises on failure and returns nothing
+            if result.get('success', True):
+                self.stats["loaded"] += 1
+            else:
+                self.stats["skipped"] += 1
+
+    def has_session(self, now=None):
+        """True if a non-expired Google session cookie is stored (no page load needed)"""
+        now = time.time() if now is None else now
+        for domain, cookies in self.load().items():
+            if not domain.endswith('google.com'):
+                continue
+            for cookie in cookies:
+                if cookie.get('name') in SESSION_COOKIES and cookie.get('expires', now + 1) > now:
+                    return True
+        return False
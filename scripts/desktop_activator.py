@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+DESKTOP SOCKET ACTIVATION
+Listens on the RDP and VNC ports and only starts the display stack when someone
+connects; stops it again after an idle period to give the memory back
+"""
+
+import argparse
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+
+import procfs
+from launcher import Launcher, Service, path_ready, port_ready
+from log_setup import setup_logging
+
+IDLE_TIMEOUT = float(os.environ.get('DESKTOP_IDLE_TIMEOUT', '900'))
+CHUNK = 64 * 1024
+
+
+def vnc_stack():
+    return [
+        Service('xvfb', ['Xvfb', ':99', '-screen', '0', '1280x720x24'], path_ready('/tmp/.X11-unix/X99')),
+        Service('x11vnc', ['x11vnc', '-display', ':99', '-forever', '-shared', '-localhost',
+                           '-rfbport', '15900', '-passwd', 'coder123'],
+                port_ready(15900), depends=('xvfb',), required=True),
+    ]
+
+
+def rdp_stack():
+    return [
+        Service('xrdp-sesman', ['xrdp-sesman', '--nodaemon'], port_ready(3350)),
+        Service('xrdp', ['xrdp', '--nodaemon', '--port', '13389'],
+                port_ready(13389), depends=('xrdp-sesman',), required=True),
+    ]
+
+
+class Backend:
+    """A listen port fronting a lazily started stack on an internal port"""
+
+    def __init__(self, name, listen_port, target_port, stack, idle_timeout=IDLE_TIMEOUT):
+        self.name = name
+        self.listen_port = listen_port
+        self.target_port = target_port
+        self.stack = stack
+        self.idle_timeout = idle_timeout
+        self.lock = threading.Lock()
+        self.services = None
+        self.connections = 0
+        self.last_active = time.monotonic()
+        self.activations = 0
+        self.reclaimed_bytes = 0
+
+    @property
+    def running(self):
+        return self.services is not None and all(
+            s.process.poll() is None for s in self.services if s.process)
+
+    def ensure_started(self):
+        """Start the stack on first use; later connections return immediately"""
+        with self.lock:
+            if self.running:
+                return True
+            if self.services is not None:
+                # Part of the stack died on its own; clear the rest before restarting
+                self.kill_services(self.services)
+                self.services = None
+            begin = time.monotonic()
+            services = self.stack()
+            ok = Launcher(services, ready_file=None).run()
+            elapsed = time.monotonic() - begin
+            if not ok:
+                self.kill_services(services)
+                logging.error(f"❌ {self.name}: stack failed to start after {elapsed:.2f}s")
+                return False
+            self.services = services
+            self.activations += 1
+            logging.info(f"🖥 {self.name}: stack started on demand in {elapsed:.2f}s",
+                         extra={"event": "desktop_start", "step": self.name, "duration": elapsed})
+            return True
+
+    def stop_if_idle(self, now):
+        with self.lock:
+            if self.services is None or self.connections or now - self.last_active < self.idle_timeout:
+                return
+            # Measure exactly the processes that get signalled
+            pids = self.service_pids(self.services)
+            rss = sum(stats["rss_bytes"] for stats in map(procfs.process_stats, pids) if stats)
+            self.kill_services(self.services, pids)
+            self.services = None
+            self.reclaimed_bytes += rss
+            logging.info(f"💤 {self.name}: idle for {now - self.last_active:.0f}s, stopped stack "
+                         f"(reclaimed {rss / 1048576:.0f} MB)",
+                         extra={"event": "desktop_stop", "step": self.name})
+
+    @staticmethod
+    def service_pids(services):
+        """Every live process of the stack: each service and its descendants, even in other groups"""
+        pids = []
+        for service in services:
+            if service.process and service.process.poll() is None:
+                pids.extend(procfs.process_tree(service.process.pid))
+        return pids
+
+    @classmethod
+    def kill_services(cls, services, pids=None):
+        for pid in cls.service_pids(services) if pids is None else pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except OSError:
+                pass
+
+    def touch(self, delta):
+        with self.lock:
+            self.connections += delta
+            self.last_active = time.monotonic()
+
+
+def pump(src, dst):
+    """Copy src -> dst until EOF; kernel-side splice through a pipe when available"""
+    try:
+        if hasattr(os, 'splice'):
+            r, w = os.pipe()
+            try:
+                while True:
+                    n = os.splice(src.fileno(), w, CHUNK)
+                    if n == 0:
+                        break
+                    while n:
+                        n -= os.splice(r, dst.fileno(), n)
+            finally:
+                os.close(r)
+                os.close(w)
+        else:
+            while True:
+                data = src.recv(CHUNK)
+                if not data:
+                    break
+                dst.sendall(data)
+    except OSError:
+        pass
+    finally:
+        try:
+            dst.shutdown(socket.SHUT_WR)
+        except OSError:
+            pass
+
+
+def handle(backend, client):
+    backend.touch(+1)
+    try:
+        if not backend.ensure_started():
+            return
+        with socket.create_connection(('127.0.0.1', backend.target_port), timeout=10) as upstream:
+            upstream.settimeout(None)
+            other = threading.Thread(target=pump, args=(upstream, client), daemon=True)
+            other.start()
+            pump(client, upstream)
+            other.join()
+    except OSError as e:
+        logging.warning(f"⚠ {backend.name}: relay failed: {e}")
+    finally:
+        client.close()
+        backend.touch(-1)
+
+
+def serve(backend):
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind(('0.0.0.0', backend.listen_port))
+    listener.listen(16)
+    logging.info(f"👂 {backend.name}: listening on {backend.listen_port} -> 127.0.0.1:{backend.target_port}")
+    while True:
+        client, _ = listener.accept()
+        threading.Thread(target=handle, args=(backend, client), daemon=True).start()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Start the desktop stack on the first RDP/VNC connection")
+    parser.add_argument('--idle-timeout', type=float, default=IDLE_TIMEOUT,
+                        help="seconds without connections before the stack is stopped")
+    args = parser.parse_args()
+
+    setup_logging('/home/coder/logs/desktop_activator.log')
+    backends = [
+        Backend('rdp', 3389, 13389, rdp_stack, args.idle_timeout),
+        Backend('vnc', 5900, 15900, vnc_stack, args.idle_timeout),
+    ]
+    for backend in backends:
+        threading.Thread(target=serve, args=(backend,), daemon=True, name=backend.name).start()
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    while not stop.wait(30.0):
+        now = time.monotonic()
+        for backend in backends:
+            backend.stop_if_idle(now)
+    for backend in backends:
+        if backend.running:
+            backend.kill_services(backend.services)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+WEBDRIVER INSTRUMENTATION
+Transparent proxy around a WebDriver that times every command and attributes
+it to the automator method that issued it
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+
+# Latency histogram bucket upper bounds (seconds)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def payload_size(value):
+    """Cheap size estimate: exact for text/bytes, shallow for containers"""
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(payload_size(k) + payload_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(payload_size(v) for v in value)
+    return 0
+
+
+class CommandStats:
+    __slots__ = ('count', 'errors', 'seconds', 'bytes_in', 'bytes_out', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.buckets = [0] * (len(BUCKETS) + 1)  # last one is +Inf
+
+    def observe(self, elapsed, bytes_in, bytes_out, failed):
+        self.count += 1
+        self.errors += failed
+        self.seconds += elapsed
+        self.bytes_in += bytes_in
+        self.bytes_out += bytes_out
+        for i, bound in enumerate(BUCKETS):
+            if elapsed <= bound:
+                self.buckets[i] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+
+
+class DriverStats:
+    """
+    Per (command, caller) counters. `source` is the file whose functions count
+    as callers; private helpers and lambdas are skipped so probes made through
+    get_status()/wait_for() are charged to the method that asked for them.
+    """
+
+    def __init__(self, source, enabled=True, helpers=('get_status',)):
+        self.source = source
+        self.enabled = enabled
+        self.helpers = set(helpers)
+        self.lock = threading.Lock()
+        self.commands = {}
+        self.started_at = time.time()
+
+    def wrap(self, driver):
+        """Return an instrumented proxy, or the driver itself when disabled"""
+        if not self.enabled or driver is None:
+            return driver
+        return InstrumentedDriver(driver, self)
+
+    def caller(self):
+        frame = sys._getframe(2)
+        while frame is not None:
+            code = frame.f_code
+            if (code.co_filename == self.source and not code.co_name.startswith(('_', '<'))
+                    and code.co_name not in self.helpers):
+                return code.co_name
+            frame = frame.f_back
+        return 'other'
+
+    def observe(self, command, elapsed, bytes_in, bytes_out, failed):
+        key = (command, self.caller())
+        with self.lock:
+            stats = self.commands.get(key)
+            if stats is None:
+                stats = self.commands[key] = CommandStats()
+            stats.observe(elapsed, bytes_in, bytes_out, failed)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "since": self.started_at,
+                "buckets": list(BUCKETS),
+                "commands": [
+                    {"command": command, "caller": caller, "count": s.count, "errors": s.errors,
+                     "seconds": round(s.seconds, 6), "bytes_in": s.bytes_in, "bytes_out": s.bytes_out,
+                     "buckets": list(s.buckets)}
+                    for (command, caller), s in sorted(self.commands.items())
+                ],
+            }
+
+    def dump(self, path, **extra):
+        """Write the snapshot (plus any extra sections, e.g. locator stats) atomically"""
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(dict(self.snapshot(), **extra), f)
+        os.replace(tmp, path)
+
+
+class InstrumentedDriver:
+    """Forwards everything to the real driver; methods and properties are timed"""
+
+    def __init__(self, driver, stats):
+        object.__setattr__(self, '_driver', driver)
+        object.__setattr__(self, '_stats', stats)
+        # attribute name -> 'property' | 'method' | 'plain'
+        object.__setattr__(self, '_kinds', {})
+
+    def _kind(self, name):
+        kind = self._kinds.get(name)
+        if kind is None:
+            attr = getattr(type(self._driver), name, None)
+            if isinstance(attr, property):
+                kind = 'property'
+            elif callable(attr) and not name.startswith('_'):
+                kind = 'method'
+            else:
+                kind = 'plain'
+            self._kinds[name] = kind
+        return kind
+
+    def __getattr__(self, name):
+        driver = self._driver
+        kind = self._kind(name)
+        if kind == 'plain' or not self._stats.enabled:
+            return getattr(driver, name)
+        if kind == 'property':
+            begin = time.perf_counter()
+            failed = True
+            value = None
+            try:
+                value = getattr(driver, name)
+                failed = False
+                return value
+            finally:
+                self._stats.observe(name, time.perf_counter() - begin, 0, payload_size(value), failed)
+
+        method = getattr(driver, name)
+        stats = self._stats
+
+        def timed(*args, **kwargs):
+            begin = time.perf_counter()
+            failed = True
+            result = None
+            try:
+                result = method(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                stats.observe(name, time.perf_counter() - begin,
+                              payload_size(args) + payload_size(kwargs), payload_size(result), failed)
+        return timed
+
+    def __setattr__(self, name, value):
+        setattr(self._driver, name, value)
+
+
+def export_metrics(snapshot, out):
+    """Write a DriverStats snapshot into a metrics.MetricsWriter"""
+    bounds = [str(b) for b in snapshot["buckets"]] + ['+Inf']
+    for entry in snapshot["commands"]:
+        labels = {"command": entry["command"], "caller": entry["caller"]}
+        cumulative = 0
+        for le, n in zip(bounds, entry["buckets"]):
+            cumulative += n
+            out.add('webdriver_command_seconds_bucket', cumulative, 'WebDriver command latency',
+                    kind='histogram', family='webdriver_command_seconds', **labels, le=le)
+        out.add('webdriver_command_seconds_sum', entry["seconds"], 'WebDriver command latency',
+                kind='histogram', family='webdriver_command_seconds', **labels)
+        out.add('webdriver_command_seconds_count', entry["count"], 'WebDriver command latency',
+                kind='histogram', family='webdriver_command_seconds', **labels)
+        out.add('webdriver_command_errors_total', entry["errors"], 'WebDriver commands that raised',
+                kind='counter', **labels)
+        out.add('webdriver_command_sent_bytes_total', entry["bytes_in"],
+                'Approximate argument bytes sent with WebDriver commands', kind='counter', **labels)
+        out.add('webdriver_command_received_bytes_total', entry["bytes_out"],
+                'Approximate result bytes returned by WebDriver commands', kind='counter', **labels)
+    for name, locator in snapshot.get("locators", {}).items():
+        for result in ('hits', 'misses', 'not_found'):
+            out.add('locator_lookups_total', locator[result], 'Element lookups by cache outcome',
+                    kind='counter', locator=name, result=result)
+
+
+def print_table(snapshot):
+    header = f"{'command':<24}{'caller':<24}{'count':>7}{'errors':>7}{'avg ms':>9}{'total s':>9}{'KB out':>9}"
+    print(header)
+    print('-' * len(header))
+    rows = sorted(snapshot["commands"], key=lambda e: e["seconds"], reverse=True)
+    for e in rows:
+        avg = e["seconds"] / e["count"] * 1000 if e["count"] else 0.0
+        print(f"{e['command']:<24}{e['caller']:<24}{e['count']:>7}{e['errors']:>7}"
+              f"{avg:>9.1f}{e['seconds']:>9.2f}{e['bytes_out'] / 1024:>9.1f}")
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else '/home/coder/logs/webdriver_stats.json'
+    with open(path) as f:
+        snapshot = json.load(f)
+    print(f"WebDriver commands since {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(snapshot['since']))}")
+    print_table(snapshot)
+    for name, locator in snapshot.get("locators", {}).items():
+        print(f"\n{name}: {locator['lookups']} lookups, {locator['hits']} hits, {locator['misses']} misses, "
+              f"{locator['not_found']} not found; cached {locator['cached']!r}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,35 +1,266 @@
 #!/usr/bin/env python3
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 import json
-import subprocess
+import os
+import struct
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+
+from config import Config
+from health_checks import Check, CheckRegistry, process_alive, tcp_port_open, log_fresh, ready_marker
+from driver_stats import export_metrics
+from log_indexer import EVENT_TYPES, LogIndexer
+from log_setup import setup_logging
+from metrics import MetricsSampler
+import profiling
+from timeseries import TimeSeriesStore
+
+# Port, log dir and sampling intervals (config.py); intervals reload live
+config = Config()
+PORT = config.health_port
+LOG_DIR = config.log_dir
+# A cached sample older than this many intervals is treated as unhealthy
+MAX_STALE_INTERVALS = 3
+# Written by the automator (timeseries.py)
+HISTORY_FILE = f'{LOG_DIR}/history.ring'
+
+# Components launched by startup.sh / start_services.sh.
+# Only required components decide the overall /health status.
+registry = CheckRegistry()
+# code-server's launcher execs node, so its process name is not "code-server";
+# the port it serves on is what the launcher waits for as well
+registry.register(Check('code-server', tcp_port_open(8080), required=True))
+registry.register(Check('sshd', process_alive('sshd')))
+registry.register(Check('xrdp', process_alive('xrdp')))
+registry.register(Check('xvfb', process_alive('Xvfb')))
+registry.register(Check('vnc', process_alive('x11vnc', 'Xtightvnc', 'Xvnc')))
+registry.register(Check('colab-automator', log_fresh(f'{LOG_DIR}/colab_automation.log', max_age=600)))
+# Under launcher.py, stay unhealthy until every required service has come up
+if os.environ.get('HEALTH_REQUIRE_STARTUP') == '1':
+    registry.register(Check('startup', ready_marker('/tmp/services-ready.json'), required=True))
+
+
+class HealthState:
+    """Background sampler that keeps the latest health result in memory"""
+
+    def __init__(self, registry, interval):
+        self.registry = registry
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.result = {"status": "starting", "service": "VS Code Terminal"}
+        self.sampled_at = 0.0
+
+    def sample(self):
+        """Run every registered check once and store the result"""
+        components = self.registry.run_all()
+        healthy = all(c["status"] == "up" for c in components.values() if c["required"])
+        result = {
+            "status": "healthy" if healthy else "unhealthy",
+            "service": "VS Code Terminal",
+            "components": components,
+        }
+        with self.lock:
+            self.result = result
+            self.sampled_at = time.time()
+
+    def run(self):
+        """Sample forever on a fixed interval"""
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.sample()
+            except Exception:
+                pass
+
+    def snapshot(self):
+        """Return the cached result plus how old it is"""
+        with self.lock:
+            result = dict(self.result)
+            sampled_at = self.sampled_at
+        age = time.time() - sampled_at
+        result["checked_at"] = sampled_at
+        result["age_seconds"] = round(age, 3)
+        if age > self.interval * MAX_STALE_INTERVALS:
+            result["status"] = "stale"
+        return result
+
+
+# How often the background sampler refreshes process state; /metrics is
+# cheaper to serve than to collect, so it is sampled less often
+state = HealthState(registry, config.health_sample_interval)
+metrics = MetricsSampler(config.metrics_sample_interval)
+
+
+def health_metrics(out):
+    """Expose the cached component checks alongside the resource metrics"""
+    result = state.snapshot()
+    for name, component in result.get("components", {}).items():
+        out.add('health_component_up', int(component["status"] == "up"),
+                'Whether the component check passed', component=name)
+        out.add('health_check_latency_seconds', round(component["latency_ms"] / 1000, 5),
+                'Latency of the last component check', component=name)
+    out.add('health_sample_age_seconds', result["age_seconds"], 'Age of the cached health sample')
+
+
+metrics.collectors.append(health_metrics)
+
+
+def webdriver_metrics(out):
+    """Per-command WebDriver latency, as last dumped by the automator"""
+    try:
+        with open(f'{LOG_DIR}/webdriver_stats.json') as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return
+    export_metrics(snapshot, out)
+
+
+metrics.collectors.append(webdriver_metrics)
+
+
+def task_metrics(out):
+    """Keep-alive task runs, failures and durations from the automator's state snapshot"""
+    try:
+        with open(f'{LOG_DIR}/automator_state.json') as f:
+            tasks = json.load(f).get("tasks", {})
+    except (OSError, ValueError):
+        return
+    for name, task in tasks.items():
+        out.add('automator_task_runs_total', task.get("runs"), 'Keep-alive task runs', kind='counter', task=name)
+        out.add('automator_task_failures_total', task.get("failures"), 'Keep-alive task runs that raised',
+                kind='counter', task=name)
+        out.add('automator_task_duration_seconds_total', task.get("total_duration"),
+                'Time spent running the keep-alive task', kind='counter', task=name)
+        out.add('automator_task_last_duration_seconds', task.get("last_duration"),
+                'Duration of the last run of the keep-alive task', task=name)
+        out.add('automator_task_max_duration_seconds', task.get("max_duration"),
+                'Longest run of the keep-alive task', task=name)
+
+
+metrics.collectors.append(task_metrics)
+
+events = LogIndexer(f'{LOG_DIR}/.index', [
+    f'{LOG_DIR}/colab_automation.log',
+    f'{LOG_DIR}/restart.log',
+    f'{LOG_DIR}/supervisor.log',
+])
+
+
+def apply_config(changes):
+    state.interval = config.health_sample_interval
+    metrics.interval = config.metrics_sample_interval
+    events.interval = config.events_index_interval
+
+
+config.on_change(apply_config)
+
 
 class HealthHandler(BaseHTTPRequestHandler):
     def do_GET(self):
-        if self.path == '/health':
+        url = urlsplit(self.path)
+        if url.path == '/events':
+            self.send_events(parse_qs(url.query))
+        elif url.path == '/history':
+            self.send_history(parse_qs(url.query))
+        elif url.path == '/health':
             try:
-                result = subprocess.run(['pgrep', '-x', 'code-server'], 
-                                      capture_output=True, text=True)
-                if result.returncode == 0:
-                    self.send_response(200)
-                    self.send_header('Content-type', 'application/json')
-                    self.end_headers()
-                    response = {"status": "healthy", "service": "VS Code Terminal"}
-                    self.wfile.write(json.dumps(response).encode())
-                else:
-                    self.send_response(503)
-                    self.end_headers()
-            except:
+                result = state.snapshot()
+                code = 200 if result["status"] == "healthy" else 503
+                self.send_json(code, result)
+            except Exception:
                 self.send_response(500)
                 self.end_headers()
+        elif url.path.startswith('/health/'):
+            name = url.path[len('/health/'):]
+            result = state.snapshot()
+            component = result["components"].get(name) if "components" in result else None
+            if component is None:
+                self.send_json(404, {"error": f"unknown component: {name}"})
+            else:
+                component = dict(component, name=name, age_seconds=result["age_seconds"])
+                self.send_json(200 if component["status"] == "up" else 503, component)
+        elif url.path == '/metrics':
+            body = metrics.render().encode()
+            self.send_response(200)
+            self.send_header('Content-type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
         else:
             self.send_response(200)
             self.send_header('Content-type', 'text/html')
             self.end_headers()
             self.wfile.write(b'<h1>VS Code Cloud Terminal</h1><p>Health check OK</p>')
-    
+
+    def send_events(self, query):
+        """/events?since=<unix time>&type=<event type>&limit=<n>"""
+        try:
+            since = float(query.get('since', ['0'])[0])
+            limit = int(query.get('limit', ['200'])[0])
+        except ValueError:
+            self.send_json(400, {"error": "since and limit must be numbers"})
+            return
+        kind = query.get('type', [None])[0]
+        if kind is not None and kind not in EVENT_TYPES:
+            self.send_json(400, {"error": f"unknown type: {kind}", "types": EVENT_TYPES})
+            return
+        self.send_json(200, {"events": events.query(since, kind, limit)})
+
+    def send_history(self, query):
+        """/history?window=<seconds>&step=<seconds>[&series=<name>]"""
+        try:
+            window = float(query.get('window', ['3600'])[0])
+            step = float(query.get('step', ['60'])[0])
+        except ValueError:
+            self.send_json(400, {"error": "window and step must be numbers"})
+            return
+        if window <= 0 or step <= 0 or window / step > 10000:
+            self.send_json(400, {"error": "window and step must be positive, at most 10000 buckets"})
+            return
+        try:
+            # Mapped per request: the automator may recreate the file at any time
+            store = TimeSeriesStore(HISTORY_FILE, readonly=True)
+        except (OSError, ValueError, struct.error):
+            self.send_json(404, {"error": "no history recorded yet"})
+            return
+        try:
+            names = query.get('series') or list(store.series)
+            unknown = [n for n in names if n not in store.index]
+            if unknown:
+                self.send_json(400, {"error": f"unknown series: {', '.join(unknown)}",
+                                     "series": list(store.series)})
+                return
+            now = time.time()
+            self.send_json(200, {
+                "window": window, "step": step, "now": now,
+                "series": {n: store.downsample(n, window, step, now) for n in names},
+            })
+        finally:
+            store.close()
+
+    def send_json(self, code, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(code)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
     def log_message(self, format, *args):
         pass
 
+
 if __name__ == "__main__":
-    server = HTTPServer(('0.0.0.0', 8081), HealthHandler)
+    setup_logging(f'{LOG_DIR}/health_server.log')
+    # SIGUSR1: cProfile capture, SIGUSR2: tracemalloc diff (written to LOG_DIR)
+    profiling.install(LOG_DIR, 'health')
+    # SIGHUP or saving the config file picks up new sampling intervals
+    config.watch()
+    state.sample()
+    metrics.sample()
+    threading.Thread(target=state.run, daemon=True).start()
+    threading.Thread(target=metrics.run, daemon=True).start()
+    threading.Thread(target=events.run, args=(config.events_index_interval,), daemon=True).start()
+    server = ThreadingHTTPServer(('0.0.0.0', PORT), HealthHandler)
     server.serve_forever()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+HEALTH CHECK REGISTRY
+Pluggable component checks that run concurrently, each under its own timeout
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+
+from procfs import find_pids
+
+
+class Check:
+    """A named probe; the probe returns (ok, detail)"""
+
+    def __init__(self, name, probe, timeout=2.0, required=False):
+        self.name = name
+        self.probe = probe
+        self.timeout = timeout
+        self.required = required
+        # Thread of a previous run that never returned (hung probe)
+        self.pending = None
+
+
+def process_alive(*names):
+    """Probe that passes if any process with one of these names exists"""
+    def probe():
+        for name in names:
+            pids = find_pids(name)
+            if pids:
+                return True, {"process": name, "pids": pids}
+        return False, {"process": list(names), "pids": []}
+    return probe
+
+
+def tcp_port_open(port, host='127.0.0.1', connect_timeout=1.0):
+    """Probe that passes if something accepts TCP connections on the port"""
+    def probe():
+        with socket.create_connection((host, port), timeout=connect_timeout):
+            return True, {"port": port}
+    return probe
+
+
+def log_fresh(path, max_age):
+    """Probe that passes if the log was written within max_age seconds"""
+    def probe():
+        try:
+            age = time.time() - os.stat(path).st_mtime
+        except OSError:
+            return False, {"log": path, "age_seconds": None}
+        return age <= max_age, {"log": path, "age_seconds": round(age, 1)}
+    return probe
+
+
+def ready_marker(path):
+    """Probe that passes once the launcher has written path with ready=true"""
+    def probe():
+        try:
+            with open(path) as f:
+                marker = json.load(f)
+        except (OSError, ValueError):
+            return False, {"marker": path, "ready": False}
+        return bool(marker.get("ready")), {"marker": path, "ready": marker.get("ready"),
+                                           "ready_in": marker.get("ready_in")}
+    return probe
+
+
+class CheckRegistry:
+    """Holds the checks and runs them all in parallel"""
+
+    def __init__(self):
+        self.checks = {}
+
+    def register(self, check):
+        self.checks[check.name] = check
+        return check
+
+    def run_all(self):
+        """Run every check concurrently; total time ~ slowest timeout"""
+        results = {}
+        threads = {}
+        started = {}
+
+        for name, check in self.checks.items():
+            # Never stack another thread on a probe that is still hung
+            if check.pending is not None and check.pending.is_alive():
+                results[name] = self._result(check, "timeout", check.timeout, None)
+                continue
+
+            def target(check=check):
+                begin = time.monotonic()
+                try:
+                    ok, detail = check.probe()
+                    status = "up" if ok else "down"
+                except Exception as e:
+                    status, detail = "down", {"error": str(e)}
+                latency = time.monotonic() - begin
+                results.setdefault(check.name, self._result(check, status, latency, detail))
+
+            thread = threading.Thread(target=target, daemon=True, name=f"check-{name}")
+            started[name] = time.monotonic()
+            thread.start()
+            threads[name] = thread
+
+        for name, thread in threads.items():
+            check = self.checks[name]
+            remaining = check.timeout - (time.monotonic() - started[name])
+            thread.join(max(0.0, remaining))
+            if thread.is_alive():
+                check.pending = thread
+                results.setdefault(name, self._result(check, "timeout", check.timeout, None))
+            else:
+                check.pending = None
+
+        return {name: results[name] for name in self.checks}
+
+    @staticmethod
+    def _result(check, status, latency, detail):
+        result = {
+            "status": status,
+            "required": check.required,
+            "latency_ms": round(latency * 1000, 2),
+        }
+        if detail is not None:
+            result["detail"] = detail
+        return result
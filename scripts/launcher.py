@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+SERVICE LAUNCHER
+Starts the container's services in parallel, respecting dependencies, and
+only marks the container ready once every required service accepts connections.
+code-server and the health server run under supervisor.py, which restarts them;
+the launcher only waits for their ports.
+"""
+
+import json
+import logging
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+from health_checks import tcp_port_open
+from log_setup import setup_logging
+import supervisor
+from waits import wait_for
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+# health-server.py keeps /health at 503 until this file says ready
+READY_FILE = '/tmp/services-ready.json'
+
+
+def port_ready(port):
+    probe = tcp_port_open(port, connect_timeout=0.5)
+    return lambda: probe()[0]
+
+
+def path_ready(path):
+    return lambda: os.path.exists(path)
+
+
+def supervisor_ready():
+    try:
+        supervisor.query()
+    except (OSError, ValueError):
+        return False
+    return True
+
+
+class Service:
+    """argv=None: started by the supervisor, the launcher only waits until it is ready"""
+
+    def __init__(self, name, argv, ready, depends=(), required=False, timeout=60.0, env=None):
+        self.name = name
+        self.argv = argv
+        self.ready = ready
+        self.depends = depends
+        self.required = required
+        self.timeout = timeout
+        self.env = env
+        self.process = None
+        self.state = 'pending'   # pending -> starting -> ready | failed (-> ready if late) | skipped
+        self.started = None
+        self.ready_in = None
+        self.done = threading.Event()
+
+
+# Everything startup.sh used to launch one after another with '&'
+SERVICES = [
+    Service('sshd', ['service', 'ssh', 'start'], port_ready(22)),
+    # Restarts code-server and the health server whenever they exit
+    Service('supervisor', [sys.executable, os.path.join(SCRIPTS_DIR, 'supervisor.py'), 'code-server', 'health'],
+            supervisor_ready, required=True, timeout=10.0, env={'HEALTH_REQUIRE_STARTUP': '1'}),
+    Service('code-server', None, port_ready(8080), depends=('supervisor',), required=True),
+    Service('health', None, port_ready(8081), depends=('supervisor',), required=True),
+]
+
+if os.environ.get('DESKTOP_ON_DEMAND', '1') != '0':
+    # RDP/VNC ports are held by the activator; the display stack starts on first connect
+    SERVICES.append(Service('desktop-activator',
+                            [sys.executable, os.path.join(SCRIPTS_DIR, 'desktop_activator.py')],
+                            port_ready(5900)))
+else:
+    SERVICES += [
+        Service('xrdp', ['xrdp', '--nodaemon'], port_ready(3389)),
+        Service('xvfb', ['Xvfb', ':99', '-screen', '0', '1280x720x24'], path_ready('/tmp/.X11-unix/X99')),
+        Service('x11vnc', ['x11vnc', '-display', ':99', '-forever', '-shared', '-rfbport', '5900',
+                           '-passwd', 'coder123'],
+                port_ready(5900), depends=('xvfb',)),
+    ]
+
+
+class Launcher:
+    def __init__(self, services, ready_file=READY_FILE):
+        self.services = {s.name: s for s in services}
+        self.ready_file = ready_file
+        self.started_at = time.monotonic()
+
+    def bring_up(self, service):
+        """Wait for dependencies, start the process, then wait until it answers"""
+        try:
+            for dep in service.depends:
+                self.services[dep].done.wait()
+                if self.services[dep].state != 'ready':
+                    service.state = 'skipped'
+                    logging.warning(f"⚠ {service.name}: skipped, dependency {dep} is {self.services[dep].state}")
+                    return
+
+            service.state = 'starting'
+            begin = service.started = time.monotonic()
+            env = dict(os.environ, **service.env) if service.env else None
+            try:
+                if service.argv:
+                    service.process = subprocess.Popen(service.argv, env=env, start_new_session=True,
+                                                       stdin=subprocess.DEVNULL)
+            except OSError as e:
+                service.state = 'failed'
+                logging.error(f"❌ {service.name}: cannot start: {e}")
+                return
+
+            # wait_for logs the time-to-ready (or the timeout) for each service
+            if wait_for(service.ready, service.timeout, step=f"{service.name} ready"):
+                service.state = 'ready'
+                service.ready_in = time.monotonic() - begin
+            else:
+                # wait_forever() keeps checking; a slow cold start still turns ready
+                service.state = 'failed'
+        finally:
+            service.done.set()
+
+    def required_ready(self):
+        return all(s.state == 'ready' for s in self.services.values() if s.required)
+
+    def write_ready_file(self, ready):
+        if not self.ready_file:
+            return
+        payload = {
+            "ready": ready,
+            "ready_in": round(time.monotonic() - self.started_at, 2),
+            "services": {
+                name: {"state": s.state, "required": s.required,
+                       "ready_in": round(s.ready_in, 2) if s.ready_in is not None else None}
+                for name, s in self.services.items()
+            },
+        }
+        tmp = self.ready_file + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(payload, f)
+        os.replace(tmp, self.ready_file)
+
+    def run(self):
+        if self.ready_file:
+            try:
+                os.unlink(self.ready_file)
+            except OSError:
+                pass
+
+        threads = [threading.Thread(target=self.bring_up, args=(s,), name=s.name, daemon=True)
+                   for s in self.services.values()]
+        for thread in threads:
+            thread.start()
+
+        # Flip /health as soon as the required services are up; optional ones may still be starting
+        required = [s for s in self.services.values() if s.required]
+        for service in required:
+            service.done.wait()
+        ready = self.required_ready()
+        self.write_ready_file(ready)
+        if ready:
+            logging.info(f"🚀 All required services up in {time.monotonic() - self.started_at:.2f}s")
+
+        for thread in threads:
+            thread.join()
+        self.write_ready_file(ready)
+        total = time.monotonic() - self.started_at
+        for name, s in self.services.items():
+            took = f"{s.ready_in:.2f}s" if s.ready_in is not None else '-'
+            logging.info(f"   {name:<12} {s.state:<8} {took:>8}{'  (required)' if s.required else ''}")
+        if not ready:
+            logging.error(f"❌ Required services not up after {total:.2f}s; "
+                          "/health stays unhealthy until they are")
+        return ready
+
+    def wait_forever(self):
+        """Keep the container alive (replaces tail -f /dev/null) and stop children on SIGTERM"""
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: stop.set())
+        signal.signal(signal.SIGINT, lambda *_: stop.set())
+        while not stop.wait(5.0):
+            for s in self.services.values():
+                if s.process and s.state == 'ready' and s.process.poll() not in (None, 0):
+                    s.state = 'exited'
+                    logging.warning(f"⚠ {s.name} exited with {s.process.returncode}")
+                elif s.state == 'failed' and (s.argv is None or s.process and s.process.poll() is None) and s.ready():
+                    s.state = 'ready'
+                    s.ready_in = time.monotonic() - s.started
+                    logging.info(f"✅ {s.name} ready after {s.ready_in:.2f}s (past its {s.timeout:.0f}s timeout)")
+                    if s.required:
+                        ready = self.required_ready()
+                        self.write_ready_file(ready)
+                        if ready:
+                            logging.info(f"🚀 All required services up in "
+                                         f"{time.monotonic() - self.started_at:.2f}s")
+        for s in self.services.values():
+            if s.process and s.process.poll() is None:
+                try:
+                    os.killpg(s.process.pid, signal.SIGTERM)
+                except OSError:
+                    pass
+        # The supervisor needs up to its STOP_GRACE to stop code-server and the health server
+        deadline = time.monotonic() + supervisor.STOP_GRACE + 2
+        for s in self.services.values():
+            if s.process:
+                try:
+                    s.process.wait(timeout=max(0.0, deadline - time.monotonic()))
+                except subprocess.TimeoutExpired:
+                    pass
+
+
+def main():
+    setup_logging('/home/coder/logs/launcher.log')
+    launcher = Launcher(SERVICES)
+    launcher.run()
+    launcher.wait_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+LOCATOR REGISTRY
+Named element lookups with several candidate selectors, tried in one
+execute_script call; the candidate that matched last time is tried first
+"""
+
+import logging
+import threading
+
+# Candidates are XPath when they start with '/' or '(', CSS otherwise.
+# Returns [index of the matching candidate, element] or [-1, null].
+FIND_SCRIPT = """
+const [selectors, preferred] = arguments;
+const order = selectors.map((_, i) => i);
+if (preferred >= 0) {
+  order.splice(preferred, 1);
+  order.unshift(preferred);
+}
+for (const i of order) {
+  const sel = selectors[i];
+  const el = (sel[0] === '/' || sel[0] === '(')
+    ? document.evaluate(sel, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue
+    : document.querySelector(sel);
+  if (el) return [i, el];
+}
+return [-1, null];
+"""
+
+
+class Locator:
+    def __init__(self, name, candidates):
+        self.name = name
+        self.candidates = list(candidates)
+        self.cached = -1          # index of the candidate that matched last
+        self.lookups = 0
+        self.hits = 0             # cached candidate still matched
+        self.misses = 0           # another candidate matched instead; cache moved to it
+        self.not_found = 0        # no candidate matched
+        self.wins = [0] * len(self.candidates)
+
+    def stats(self):
+        return {
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_found": self.not_found,
+            "cached": self.candidates[self.cached] if self.cached >= 0 else None,
+            "wins": dict(zip(self.candidates, self.wins)),
+        }
+
+
+class LocatorRegistry:
+    def __init__(self, locators=None):
+        self.lock = threading.Lock()
+        self.locators = {}
+        for name, candidates in (locators or {}).items():
+            self.register(name, candidates)
+
+    def register(self, name, candidates):
+        self.locators[name] = Locator(name, candidates)
+
+    def find(self, driver, name):
+        """The first element matched by `name`'s candidates, or None; one round trip"""
+        locator = self.locators[name]
+        index, element = driver.execute_script(FIND_SCRIPT, locator.candidates, locator.cached) or (-1, None)
+        with self.lock:
+            locator.lookups += 1
+            if index < 0 or element is None:
+                # Nothing on the page right now (e.g. no Connect button once connected);
+                # that says nothing about which selector is right, so keep the cache
+                locator.not_found += 1
+                return None
+            if locator.cached >= 0:
+                if index == locator.cached:
+                    locator.hits += 1
+                else:
+                    locator.misses += 1
+                    logging.debug(f"Locator {name}: {locator.candidates[locator.cached]!r} stopped matching, "
+                                  f"now {locator.candidates[index]!r}")
+            locator.wins[index] += 1
+            locator.cached = index
+        return element
+
+    def invalidate(self, name):
+        with self.lock:
+            self.locators[name].cached = -1
+
+    def stats(self):
+        with self.lock:
+            return {name: locator.stats() for name, locator in self.locators.items()}
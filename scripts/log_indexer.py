@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+INCREMENTAL LOG INDEXER
+Follows the automator and restart logs from persisted byte offsets, turns
+interesting lines into typed events and keeps them in a time-ordered index
+"""
+
+import gzip
+import json
+import os
+import re
+import struct
+import threading
+import time
+
+# (event type, pattern) - first match wins
+EVENT_PATTERNS = [
+    ('connected', re.compile(r'Runtime connected')),
+    ('disconnected', re.compile(r'Runtime disconnected')),
+    ('recovery', re.compile(r'Recovery successful')),
+    ('recovery_failed', re.compile(r'Recovery failed')),
+    ('fatal', re.compile(r'Fatal error|Maximum retries reached')),
+    # automator retry loop, supervisor restarts and restart_minecraft.sh
+    ('restart', re.compile(r'\brestart(ing)?\b|not running, starting', re.IGNORECASE)),
+    # New types go last: the index stores each type's position
+    ('shutdown', re.compile(r'Shutdown complete')),
+    ('startup', re.compile(r'Automation started successfully')),
+]
+EVENT_TYPES = [name for name, _ in EVENT_PATTERNS]
+
+# Python logging:  "2026-10-18 19:07:04,214 - INFO - ..."
+LOGGING_TS = re.compile(r'^(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d),(\d{3}) - ')
+# `date` in shell scripts:  "Sun Oct 18 19:07:04 IST 2026: ..."
+DATE_TS = re.compile(r'^\w{3} (\w{3}) +(\d+) (\d\d:\d\d:\d\d) (?:\S+ )?(\d{4}): ')
+
+# Fixed-size index record: sort key, timestamp, type, offset and length into the
+# message file. The key is the timestamp raised to the previous record's key, so
+# the file stays sorted for binary search while ts keeps the real event time.
+RECORD = struct.Struct('<ddBQI')
+
+
+def parse_timestamp(line):
+    m = LOGGING_TS.match(line)
+    if m:
+        return time.mktime(time.strptime(m.group(1), '%Y-%m-%d %H:%M:%S')) + int(m.group(2)) / 1000
+    m = DATE_TS.match(line)
+    if m:
+        month, day, clock, year = m.groups()
+        return time.mktime(time.strptime(f'{year} {month} {day} {clock}', '%Y %b %d %H:%M:%S'))
+    return None
+
+
+def classify(line):
+    for name, pattern in EVENT_PATTERNS:
+        if pattern.search(line):
+            return name
+    return None
+
+
+class LogIndexer:
+    def __init__(self, index_dir, sources):
+        self.index_dir = index_dir
+        self.sources = sources
+        self.lock = threading.Lock()
+        os.makedirs(index_dir, exist_ok=True)
+        self.idx_path = os.path.join(index_dir, 'events.v2.idx')
+        self.msg_path = os.path.join(index_dir, 'events.msg')
+        self.checkpoint_path = os.path.join(index_dir, 'checkpoints.json')
+        self._drop_old_format()
+        self.checkpoints = self._load_checkpoints()
+        self.last_key = self._last_indexed_key()
+
+    # ----------------------------------------------------------- persistence
+    def _drop_old_format(self):
+        """An events.idx without sort keys is rebuilt from the logs rather than converted"""
+        old = os.path.join(self.index_dir, 'events.idx')
+        if not os.path.exists(old):
+            return
+        for path in (old, self.msg_path, self.checkpoint_path):
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+    def _load_checkpoints(self):
+        try:
+            with open(self.checkpoint_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_checkpoints(self):
+        tmp = self.checkpoint_path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.checkpoints, f)
+        os.replace(tmp, self.checkpoint_path)
+
+    def _count(self):
+        try:
+            return os.path.getsize(self.idx_path) // RECORD.size
+        except OSError:
+            return 0
+
+    def _last_indexed_key(self):
+        n = self._count()
+        if not n:
+            return 0.0
+        with open(self.idx_path, 'rb') as f:
+            return self._read_record(f, n - 1)[0]
+
+    @staticmethod
+    def _read_record(f, i):
+        f.seek(i * RECORD.size)
+        return RECORD.unpack(f.read(RECORD.size))
+
+    # -------------------------------------------------------------- indexing
+    def update(self):
+        """Read only what was appended since the last call; returns events added"""
+        added = []
+        for path in self.sources:
+            added.extend(self._follow(path))
+        if added:
+            with self.lock, open(self.idx_path, 'ab') as idx, open(self.msg_path, 'ab') as msg:
+                offset = msg.tell()
+                # Sources interleave and lines without a timestamp get "now"; sort the batch
+                # and only clamp the sort key, so late lines keep their real time
+                for ts, kind, line in sorted(added, key=lambda event: event[0]):
+                    data = line.encode()
+                    msg.write(data)
+                    self.last_key = max(ts, self.last_key)
+                    idx.write(RECORD.pack(self.last_key, ts, EVENT_TYPES.index(kind), offset, len(data)))
+                    offset += len(data)
+        self._save_checkpoints()
+        return len(added)
+
+    def _follow(self, path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return []
+        checkpoint = self.checkpoints.get(path, {"inode": st.st_ino, "offset": 0})
+        events = []
+
+        if checkpoint["inode"] != st.st_ino or st.st_size < checkpoint["offset"]:
+            # Rotated: finish the previous file from its saved offset, then start over
+            events.extend(self._read_rotated(path, checkpoint["offset"]))
+            checkpoint = {"inode": st.st_ino, "offset": 0}
+
+        with open(path, 'rb') as f:
+            f.seek(checkpoint["offset"])
+            chunk = f.read()
+        # Only consume complete lines; a partial last line is read next time
+        end = chunk.rfind(b'\n') + 1
+        events.extend(self._parse(chunk[:end]))
+        checkpoint["offset"] += end
+        self.checkpoints[path] = checkpoint
+        return events
+
+    def _read_rotated(self, path, offset):
+        for rotated, opener in ((path + '.1', open), (path + '.1.gz', gzip.open)):
+            try:
+                with opener(rotated, 'rb') as f:
+                    f.seek(offset)
+                    return self._parse(f.read())
+            except OSError:
+                continue
+        return []
+
+    def _parse(self, data):
+        events = []
+        for raw in data.decode(errors='replace').splitlines():
+            kind = classify(raw)
+            if kind is None:
+                continue
+            ts = parse_timestamp(raw) or time.time()
+            events.append((ts, kind, raw.strip()[:500]))
+        return events
+
+    # --------------------------------------------------------------- queries
+    def query(self, since=0.0, kind=None, limit=200):
+        """Events with ts >= since (optionally of one type), oldest first"""
+        with self.lock:
+            n = self._count()
+            if not n:
+                return []
+            with open(self.idx_path, 'rb') as idx, open(self.msg_path, 'rb') as msg:
+                lo, hi = 0, n
+                while lo < hi:
+                    mid = (lo + hi) // 2
+                    if self._read_record(idx, mid)[0] < since:
+                        lo = mid + 1
+                    else:
+                        hi = mid
+                results = []
+                idx.seek(lo * RECORD.size)
+                for i in range(lo, n):
+                    _, ts, code, offset, length = RECORD.unpack(idx.read(RECORD.size))
+                    # key >= since does not mean ts >= since for a late, clamped line
+                    if ts < since or kind is not None and EVENT_TYPES[code] != kind:
+                        continue
+                    msg.seek(offset)
+                    results.append({"ts": ts, "type": EVENT_TYPES[code],
+                                    "line": msg.read(length).decode(errors='replace')})
+                    if len(results) >= limit:
+                        break
+                # Late lines sit after newer ones in the file; return them in time order
+                results.sort(key=lambda event: event["ts"])
+                return results
+
+    def run(self, interval):
+        """Pick up new log lines forever; self.interval may be changed while running"""
+        self.interval = interval
+        while True:
+            try:
+                self.update()
+            except Exception:
+                pass
+            time.sleep(self.interval)
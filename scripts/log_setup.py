@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+LOGGING PIPELINE
+Queue-based logging so callers never block on disk, with rotation and a JSON-lines sink
+"""
+
+import atexit
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+
+FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per record; `event` and `duration` come from extra={...}"""
+
+    def format(self, record):
+        payload = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "event": getattr(record, 'event', 'log'),
+            "msg": record.getMessage(),
+        }
+        duration = getattr(record, 'duration', None)
+        if duration is not None:
+            payload["duration"] = round(duration, 3)
+        step = getattr(record, 'step', None)
+        if step is not None:
+            payload["step"] = step
+        return json.dumps(payload, ensure_ascii=False)
+
+
+def _gzip_namer(name):
+    return name + '.gz'
+
+
+def _gzip_rotator(source, dest):
+    """Compress the rotated segment; runs on the listener thread, not the caller's"""
+    with open(source, 'rb') as src, gzip.open(dest, 'wb') as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(source)
+
+
+def rotating_handler(path, max_bytes, backups, compress):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    handler = logging.handlers.RotatingFileHandler(
+        path, maxBytes=max_bytes, backupCount=backups, encoding='utf-8')
+    if compress:
+        handler.namer = _gzip_namer
+        handler.rotator = _gzip_rotator
+    return handler
+
+
+def setup_logging(log_file, json_file=None, level=logging.INFO, max_bytes=5 * 1024 * 1024,
+                  backups=5, compress=True, console=True):
+    """
+    Route the root logger through a QueueHandler. File, JSON and console handlers
+    run on a QueueListener thread. Returns the listener (stopped at exit).
+    """
+    handlers = []
+
+    text = rotating_handler(log_file, max_bytes, backups, compress)
+    text.setFormatter(logging.Formatter(FORMAT))
+    handlers.append(text)
+
+    if json_file:
+        events = rotating_handler(json_file, max_bytes, backups, compress)
+        events.setFormatter(JsonLinesFormatter())
+        handlers.append(events)
+
+    if console:
+        stream = logging.StreamHandler()
+        stream.setFormatter(logging.Formatter(FORMAT))
+        handlers.append(stream)
+
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(level)
+
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
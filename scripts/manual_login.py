@@ -1,206 +1,339 @@
 #!/usr/bin/env python3
 """
 ONE-TIME MANUAL LOGIN SCRIPT
-Run this once to login to Google manually
+Run this once to login to Google manually. Everything happens in one Chrome on
+the automator's profile: the login, saving the cookies, checking them in a
+fresh incognito context and (optionally) opening the Colab notebook.
+
+    python3 manual_login.py                   # interactive login, then verify
+    python3 manual_login.py --verify-only     # headless check of profile + cookies
+    python3 manual_login.py --verify-only --colab
 """
 
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-import time
-import pickle
+import argparse
+import logging
 import os
 import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import procfs
+from cdp_driver import CdpDriver
+from colab_probe import probe_runtime
+from config import Config
+from cookie_store import CookieStore
+from waits import wait_for
+
+# Same cookie file, profile and notebook as the automator
+config = Config()
+
+ACCOUNT_URL = "https://myaccount.google.com"
+
+
+class PhaseReport:
+    """Wall time and peak Chrome tree RSS of each pipeline phase"""
+
+    def __init__(self, interval=0.1):
+        self.interval = interval
+        self.phases = []
+        self.root_pid = None
+        self.peak = 0
+        self.stop = threading.Event()
+        threading.Thread(target=self._sample, daemon=True).start()
+
+    def watch(self, driver):
+        try:
+            self.root_pid = driver.service.process.pid
+        except AttributeError:
+            self.root_pid = None
+        self._sample_once()
+
+    def _sample_once(self):
+        if self.root_pid is not None:
+            self.peak = max(self.peak, procfs.tree_rss(self.root_pid))
+
+    def _sample(self):
+        while not self.stop.wait(self.interval):
+            self._sample_once()
+
+    @contextmanager
+    def phase(self, name):
+        """Yields a dict; set its "ok" to record whether the phase succeeded"""
+        self.peak = 0
+        self._sample_once()
+        entry = {"phase": name, "ok": True}
+        begin = time.monotonic()
+        try:
+            yield entry
+        except BaseException:
+            entry["ok"] = False
+            raise
+        finally:
+            entry["seconds"] = time.monotonic() - begin
+            self._sample_once()
+            entry["peak_rss"] = self.peak
+            self.phases.append(entry)
+
+    def print(self):
+        self.stop.set()
+        if not self.phases:
+            return
+        print("\n📊 Phases")
+        header = f"{'phase':<18}{'ok':>4}{'time':>10}{'peak RSS':>12}"
+        print(header)
+        print('-' * len(header))
+        for p in self.phases:
+            print(f"{p['phase']:<18}{'✓' if p['ok'] else '✗':>4}{p['seconds']:>9.2f}s"
+                  f"{p['peak_rss'] / 1048576:>9.0f} MB")
+        total = sum(p['seconds'] for p in self.phases)
+        peak = max(p['peak_rss'] for p in self.phases)
+        print(f"{'total':<18}{'':>4}{total:>9.2f}s{peak / 1048576:>9.0f} MB")
+
 
-def setup_browser():
-    """Setup browser WITHOUT headless mode (so you can see it)"""
+def setup_browser(headless=False):
+    """Chrome on the automator's profile; visible unless headless (so you can see it)"""
     chrome_options = Options()
     options = [
         '--no-sandbox',
         '--disable-dev-shm-usage',
         '--window-size=1920,1080',
-        '--disable-blink-features=AutomationControlled'
+        '--disable-blink-features=AutomationControlled',
+        f'--user-data-dir={config.user_data_dir}',
     ]
-    
+    if headless:
+        options.append('--headless=new')
+
     for option in options:
         chrome_options.add_argument(option)
-    
-    # Explicitly NOT headless
+
     chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
     chrome_options.add_experimental_option('useAutomationExtension', False)
-    
+
+    owner = procfs.clear_profile_locks(config.user_data_dir)
+    if owner is not None:
+        raise RuntimeError(f"{config.user_data_dir} is in use by Chrome (pid {owner})")
+    if config.driver_backend == 'cdp':
+        return CdpDriver(options=chrome_options)
     return webdriver.Chrome(options=chrome_options)
 
-def save_cookies(driver, filename):
+
+class IncognitoContext:
+    """
+    A throwaway browser context (Target.createBrowserContext) in the running
+    Chrome: its own empty cookie jar, so the saved cookies are tested on their
+    own without the profile's session and without starting another browser.
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.home = None
+        self.context_id = None
+        self.target_id = None
+
+    def open(self):
+        self.home = self.driver.current_window_handle
+        self.context_id = self.driver.execute_cdp_cmd('Target.createBrowserContext', {})['browserContextId']
+        self.target_id = self.driver.execute_cdp_cmd('Target.createTarget', {
+            'url': 'about:blank', 'browserContextId': self.context_id})['targetId']
+        self.driver.switch_to.window(self.target_id)
+
+    def close(self):
+        if self.context_id is None:
+            return
+        try:
+            if self.driver.current_window_handle == self.target_id:
+                self.driver.close()
+            self.driver.switch_to.window(self.home)
+            self.driver.execute_cdp_cmd('Target.disposeBrowserContext', {'browserContextId': self.context_id})
+        except Exception as e:
+            print(f"⚠ Could not close the incognito context: {e}")
+        self.context_id = None
+
+
+def status_if(driver, predicate):
+    """The page's RuntimeStatus if predicate(status) holds, else None (for wait_for)"""
+    status = probe_runtime(driver)
+    return status if predicate(status) else None
+
+
+def check_login(driver, step):
+    """Open the Google account page in the current tab; True if it stays signed in"""
+    driver.get(ACCOUNT_URL)
+    status = wait_for(
+        lambda: status_if(driver, lambda s: s.ready == 'complete' or not s.logged_in),
+        timeout=15, step=step)
+    status = status or probe_runtime(driver)
+    return status.logged_in and "myaccount.google.com" in status.url
+
+
+def check_colab(driver):
+    """Open the notebook in the current tab; True once the runtime widget renders"""
+    driver.get(config.colab_url)
+    status = wait_for(
+        lambda: status_if(driver, lambda s: s.has_widget or not s.logged_in),
+        timeout=30, step="colab_check")
+    status = status or probe_runtime(driver)
+    print(f"   Colab runtime: {status.state} ({status.url})")
+    return status.logged_in and status.has_widget
+
+
+def save_cookies(driver, store):
     """Save cookies to file"""
     try:
-        os.makedirs(os.path.dirname(filename), exist_ok=True)
-        with open(filename, 'wb') as f:
-            pickle.dump(driver.get_cookies(), f)
-        print(f"✅ Cookies saved to {filename}")
+        count = store.save_from(driver)
+        print(f"✅ {count} cookies saved to {store.path}")
         return True
     except Exception as e:
         print(f"❌ Failed to save cookies: {e}")
         return False
 
-def manual_login():
-    """Perform manual login to Google"""
+
+def interactive_login(driver):
+    """Let the user log in in the visible window; True if they ended up logged in"""
+    # Go to Google login
+    print("📝 Navigating to Google login...")
+    driver.get("https://accounts.google.com")
+
     print("\n" + "="*60)
-    print("🔑 GOOGLE MANUAL LOGIN SETUP")
-    print("="*60)
-    print("This script will open Chrome where you can login to Google.")
-    print("After login, cookies will be saved for automatic use.")
+    print("MANUAL ACTION REQUIRED:")
+    print("1. Login to your Google account in the browser window")
+    print("2. Complete any 2FA if required")
+    print("3. Wait until you see your Google account page")
+    print("4. Come back here and press ENTER")
     print("="*60 + "\n")
-    
+
+    # Wait for user to press Enter
+    input("Press ENTER after you've logged in successfully...")
+
+    # Verify login by checking current URL
+    current_url = driver.current_url
+    print(f"Current URL: {current_url}")
+
+    if "myaccount.google.com" in current_url or "drive.google.com" in current_url:
+        print("✅ Detected successful login!")
+        return True
+    print("⚠ Warning: May not be logged in")
+    response = input("Are you logged in? (y/n): ")
+    return response.lower() == 'y'
+
+
+def manual_login(verify_only=False, colab=None):
+    """
+    Login (or, with verify_only, check the stored profile) and verify the
+    saved cookies, all in one browser. colab=None asks whether to open the
+    notebook as well. Returns True if every phase passed.
+    """
+    print("\n" + "="*60)
+    if verify_only:
+        print("🔍 GOOGLE LOGIN CHECK")
+        print("="*60)
+        print("Checks the stored profile and cookies in a headless browser.")
+    else:
+        print("🔑 GOOGLE MANUAL LOGIN SETUP")
+        print("="*60)
+        print("This script will open Chrome where you can login to Google.")
+        print("After login, cookies will be saved for automatic use.")
+    print("="*60 + "\n")
+
+    owner = procfs.profile_owner(config.user_data_dir)
+    if owner is not None:
+        print(f"❌ {config.user_data_dir} is in use by Chrome (pid {owner}), probably the automator.")
+        print("   Stop the automator first (it saves its state on SIGTERM)")
+        return False
+
+    store = CookieStore(config.cookie_file)
+    report = PhaseReport()
     driver = None
+    incognito = None
     try:
         # Start browser
         print("🌐 Opening browser...")
-        driver = setup_browser()
-        
-        # Go to Google login
-        print("📝 Navigating to Google login...")
-        driver.get("https://accounts.google.com")
-        time.sleep(3)
-        
-        print("\n" + "="*60)
-        print("MANUAL ACTION REQUIRED:")
-        print("1. Login to your Google account in the browser window")
-        print("2. Complete any 2FA if required")
-        print("3. Wait until you see your Google account page")
-        print("4. Come back here and press ENTER")
-        print("="*60 + "\n")
-        
-        # Wait for user to press Enter
-        input("Press ENTER after you've logged in successfully...")
-        
-        # Verify login by checking current URL
-        current_url = driver.current_url
-        print(f"Current URL: {current_url}")
-        
-        if "myaccount.google.com" in current_url or "drive.google.com" in current_url:
-            print("✅ Detected successful login!")
+        with report.phase('launch'):
+            driver = setup_browser(headless=verify_only)
+            report.watch(driver)
+
+        if verify_only:
+            with report.phase('profile session') as phase:
+                phase["ok"] = check_login(driver, "profile_session")
+            print("✅ Profile is logged in" if phase["ok"] else "⚠ Profile is not logged in")
+            if not store.exists():
+                print(f"❌ No cookies found at {store.path}")
+                return False
         else:
-            print("⚠ Warning: May not be logged in")
-            response = input("Are you logged in? (y/n): ")
-            if response.lower() != 'y':
+            with report.phase('login') as phase:
+                phase["ok"] = interactive_login(driver)
+            if not phase["ok"]:
                 print("❌ Please try again")
-                driver.quit()
                 return False
-        
-        # Save cookies
-        cookies_file = '/home/coder/.cookies/google_cookies.pkl'
-        if save_cookies(driver, cookies_file):
-            # Test cookies by loading them in a new session
-            print("\n🧪 Testing saved cookies...")
-            
-            # Create a quick test to verify cookies work
-            test_driver = setup_browser()
-            test_driver.get("https://myaccount.google.com")
-            
-            # Load cookies
-            if os.path.exists(cookies_file):
-                with open(cookies_file, 'rb') as f:
-                    cookies = pickle.load(f)
-                    for cookie in cookies:
-                        try:
-                            test_driver.add_cookie(cookie)
-                        except:
-                            pass
-                
-                # Refresh to apply cookies
-                test_driver.refresh()
-                time.sleep(3)
-                
-                # Check if we're logged in
-                if "myaccount.google.com" in test_driver.current_url:
-                    print("✅ Cookies verified! They work correctly.")
-                else:
-                    print("⚠ Cookies may not work properly")
-            
-            test_driver.quit()
-            
+            with report.phase('save cookies') as phase:
+                phase["ok"] = save_cookies(driver, store)
+            if not phase["ok"]:
+                return False
+
+        # Test the cookie file the way a cold automator start uses it: on an empty jar
+        print("\n🧪 Testing saved cookies in an incognito context...")
+        incognito = IncognitoContext(driver)
+        with report.phase('verify cookies') as phase:
+            incognito.open()
+            stats = store.inject(driver)
+            print(f"   {stats['loaded']} loaded, {stats['skipped']} skipped, {stats['expired']} expired")
+            phase["ok"] = check_login(driver, "verify_cookies")
+        print("✅ Cookies verified! They work correctly." if phase["ok"] else "⚠ Cookies may not work properly")
+
+        if colab is None:
+            colab = input("\nRun quick Colab access test? (y/n): ").lower() == 'y'
+        if colab:
+            print("\n🧪 Testing Colab access...")
+            with report.phase('colab access') as phase:
+                phase["ok"] = check_colab(driver)
+            print("✅ Colab access verified!" if phase["ok"] else "⚠ Could not access Colab")
+
+        ok = all(p["ok"] for p in report.phases)
+        if ok and not verify_only:
             print("\n" + "="*60)
             print("✅ SETUP COMPLETE!")
             print("="*60)
             print("You can now run the automated script.")
-            print("Run: python3 ~/scripts/my_colab_automation.py")
-            print("Or start it in screen: screen -dmS colab python3 ~/scripts/my_colab_automation.py")
+            print("Run: ~/scripts/restart_minecraft.sh")
+            print("(starts it under the supervisor, which restarts it if it exits)")
             print("="*60)
-            
-            return True
-        else:
-            print("❌ Failed to save cookies")
-            return False
-            
+        return ok
+
     except Exception as e:
-        print(f"❌ Error during manual login: {e}")
+        print(f"❌ Error during {'login check' if verify_only else 'manual login'}: {e}")
         return False
     finally:
+        if incognito:
+            incognito.close()
         if driver:
             print("\n🔄 Closing browser...")
-            driver.quit()
+            with report.phase('quit'):
+                driver.quit()
+        report.print()
 
-def quick_colab_test():
-    """Quick test to verify Colab access"""
-    print("\n🧪 Testing Colab access...")
-    
-    try:
-        # Setup headless browser for test
-        chrome_options = Options()
-        chrome_options.add_argument('--headless=new')
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        
-        driver = webdriver.Chrome(options=chrome_options)
-        
-        # Load cookies
-        cookies_file = '/home/coder/.cookies/google_cookies.pkl'
-        if os.path.exists(cookies_file):
-            driver.get("https://colab.research.google.com")
-            with open(cookies_file, 'rb') as f:
-                cookies = pickle.load(f)
-                for cookie in cookies:
-                    try:
-                        driver.add_cookie(cookie)
-                    except:
-                        pass
-            
-            driver.refresh()
-            time.sleep(3)
-            
-            if "colab.research.google.com" in driver.current_url:
-                print("✅ Colab access verified!")
-                return True
-            else:
-                print("⚠ Could not access Colab")
-                return False
-        else:
-            print("❌ No cookies found")
-            return False
-            
-    except Exception as e:
-        print(f"❌ Test failed: {e}")
-        return False
-    finally:
-        try:
-            driver.quit()
-        except:
-            pass
 
 if __name__ == "__main__":
-    print("="*70)
-    print("GOOGLE LOGIN SETUP FOR MINECRAFT COLAB AUTOMATION")
-    print("="*70)
-    
-    # Run manual login
-    if manual_login():
-        # Optional: Run quick test
-        test = input("\nRun quick Colab access test? (y/n): ")
-        if test.lower() == 'y':
-            quick_colab_test()
-    else:
+    parser = argparse.ArgumentParser(description="Log in to Google for the Colab automation")
+    parser.add_argument('--verify-only', action='store_true',
+                        help="no login: headless check of the stored profile and cookies")
+    parser.add_argument('--colab', action='store_true',
+                        help="also open the Colab notebook (asked interactively otherwise)")
+    args = parser.parse_args()
+    # wait_for reports how long each page took to settle
+    logging.basicConfig(level=logging.INFO, format='   %(message)s')
+    # Never prompt in --verify-only mode
+    colab = True if args.colab else False if args.verify_only else None
+
+    if not args.verify_only:
+        print("="*70)
+        print("GOOGLE LOGIN SETUP FOR MINECRAFT COLAB AUTOMATION")
+        print("="*70)
+
+    if manual_login(verify_only=args.verify_only, colab=colab):
+        sys.exit(0)
+    if not args.verify_only:
         print("\n❌ Setup failed. Please try again.")
-        sys.exit(1)
+    sys.exit(1)
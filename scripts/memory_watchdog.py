@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+CHROME MEMORY WATCHDOG
+Tracks the Chrome process tree RSS and the page's JS heap, and decides when a
+planned reload or tab swap is cheaper than waiting for the OOM killer
+"""
+
+import time
+
+import procfs
+
+MB = 1024 * 1024
+# Thresholds; crossing either one asks for a recycle (config.py overrides these)
+RSS_LIMIT = 1024 * MB
+HEAP_LIMIT = 384 * MB
+# Never recycle more often than this (seconds)
+COOLDOWN = 1800.0
+
+
+class MemorySample:
+    def __init__(self, rss, js_heap):
+        self.rss = rss
+        self.js_heap = js_heap
+
+    def describe(self):
+        heap = f"{self.js_heap / MB:.0f} MB" if self.js_heap is not None else "n/a"
+        return f"RSS {self.rss / MB:.0f} MB, JS heap {heap}"
+
+
+class MemoryWatchdog:
+    def __init__(self, rss_limit=RSS_LIMIT, heap_limit=HEAP_LIMIT, cooldown=COOLDOWN, clock=None):
+        self.rss_limit = rss_limit
+        self.heap_limit = heap_limit
+        self.cooldown = cooldown
+        self.clock = clock or time.monotonic
+        self.last_recycle = None
+        self.last_action = None
+        self.last_after = None
+        self.recycles = {"reload": 0, "tab": 0}
+        self.reclaimed_bytes = 0
+
+    def sample(self, driver):
+        """Chrome tree RSS from /proc plus JSHeapUsedSize from DevTools"""
+        try:
+            rss = procfs.tree_rss(driver.service.process.pid)
+        except Exception:
+            rss = 0
+        js_heap = None
+        try:
+            driver.execute_cdp_cmd('Performance.enable', {})
+            metrics = driver.execute_cdp_cmd('Performance.getMetrics', {}).get('metrics', [])
+            for metric in metrics:
+                if metric.get('name') == 'JSHeapUsedSize':
+                    js_heap = int(metric['value'])
+                    break
+        except Exception:
+            pass
+        return MemorySample(rss, js_heap)
+
+    def over_limit(self, sample):
+        return sample.rss > self.rss_limit or (
+            sample.js_heap is not None and sample.js_heap > self.heap_limit)
+
+    def action(self, sample):
+        """'reload', 'tab' or None. A reload that did not get us back under the
+        limit escalates to a tab swap, which also gets a fresh renderer"""
+        if not self.over_limit(sample):
+            return None
+        now = self.clock()
+        if self.last_recycle is not None and now - self.last_recycle < self.cooldown:
+            return None
+        if self.last_action == 'reload' and self.last_after is not None and self.over_limit(self.last_after):
+            return 'tab'
+        if sample.rss > self.rss_limit and sample.js_heap is not None and sample.js_heap < self.heap_limit:
+            # The heap is fine, so the growth is in the renderer itself
+            return 'tab'
+        return 'reload'
+
+    def record(self, action, before, after):
+        """Remember the outcome; returns bytes reclaimed (may be negative)"""
+        reclaimed = before.rss - after.rss
+        self.last_recycle = self.clock()
+        self.last_action = action
+        self.last_after = after
+        self.recycles[action] += 1
+        self.reclaimed_bytes += max(0, reclaimed)
+        return reclaimed
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+PROMETHEUS METRICS
+Background sampler that renders process/container metrics in the text exposition format
+"""
+
+import threading
+import time
+
+import procfs
+
+
+class ProcessGroup:
+    """
+    Processes matched by exact comm name or by a substring of the program or
+    script being run (the first two cmdline words). Later arguments are not
+    searched: `supervisor.py code-server health` is not code-server.
+    """
+
+    def __init__(self, name, comms=(), cmdline=None):
+        self.name = name
+        self.comms = {c[:15] for c in comms}
+        self.cmdline = cmdline
+
+    def matches(self, comm, cmdline):
+        if comm in self.comms:
+            return True
+        if self.cmdline is None or cmdline is None:
+            return False
+        return any(self.cmdline in word for word in cmdline.split(' ', 2)[:2])
+
+
+# Managed processes; code-server and the automator run under node/python,
+# so they are recognised by their command line instead of the process name
+PROCESS_GROUPS = [
+    ProcessGroup('code-server', comms=('code-server',), cmdline='code-server'),
+    ProcessGroup('chrome', comms=('chrome', 'chromium', 'chromium-browse', 'headless_shell')),
+    ProcessGroup('chromedriver', comms=('chromedriver',)),
+    ProcessGroup('automator', cmdline='my_colab_automation.py'),
+]
+
+
+def sample_groups(groups):
+    """Sum per-process stats for every group in a single /proc walk"""
+    totals = {g.name: {"count": 0, "rss_bytes": 0, "cpu_seconds": 0.0, "threads": 0, "fds": 0}
+              for g in groups}
+    for pid in procfs.list_pids():
+        comm = procfs.read_comm(pid)
+        if comm is None:
+            continue
+        cmdline = None
+        for group in groups:
+            if group.cmdline is not None and cmdline is None:
+                cmdline = procfs.read_cmdline(pid)
+            if not group.matches(comm, cmdline):
+                continue
+            stats = procfs.process_stats(pid)
+            if stats is None:
+                break
+            total = totals[group.name]
+            total["count"] += 1
+            total["rss_bytes"] += stats["rss_bytes"]
+            total["cpu_seconds"] += stats["cpu_seconds"]
+            total["threads"] += stats["threads"]
+            total["fds"] += stats["fds"] or 0
+            break  # a process is counted in its first matching group only
+    return totals
+
+
+class MetricsWriter:
+    """Collects samples grouped per metric family, as the text format requires"""
+
+    def __init__(self):
+        # name -> (help, type, [sample lines]); dicts keep insertion order
+        self.families = {}
+
+    def add(self, name, value, help_text, kind='gauge', family=None, **labels):
+        """`family` groups e.g. histogram _bucket/_sum/_count samples under one name"""
+        if value is None:
+            return
+        family = self.families.setdefault(family or name, (help_text, kind, []))
+        if labels:
+            label_str = ','.join(f'{k}="{v}"' for k, v in labels.items())
+            family[2].append(f'{name}{{{label_str}}} {value}')
+        else:
+            family[2].append(f'{name} {value}')
+
+    def render(self):
+        lines = []
+        for name, (help_text, kind, samples) in self.families.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            lines.extend(samples)
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsSampler:
+    """Samples /proc and cgroup files on an interval and caches the rendered text"""
+
+    def __init__(self, interval, groups=PROCESS_GROUPS, disk_paths=('/home/coder', '/')):
+        self.interval = interval
+        self.groups = groups
+        self.disk_paths = disk_paths
+        # Extra collectors: callables taking a MetricsWriter
+        self.collectors = []
+        self.lock = threading.Lock()
+        self.text = ''
+
+    def sample(self):
+        begin = time.monotonic()
+        out = MetricsWriter()
+
+        for name, total in sample_groups(self.groups).items():
+            out.add('process_group_count', total["count"],
+                    'Number of running processes in the group', group=name)
+            out.add('process_group_resident_memory_bytes', total["rss_bytes"],
+                    'Resident set size summed over the group', group=name)
+            out.add('process_group_cpu_seconds_total', round(total["cpu_seconds"], 2),
+                    'User+system CPU seconds of live processes in the group', kind='counter', group=name)
+            out.add('process_group_open_fds', total["fds"],
+                    'Open file descriptors summed over the group', group=name)
+            out.add('process_group_threads', total["threads"],
+                    'Threads summed over the group', group=name)
+
+        usage, limit = procfs.memory_usage()
+        out.add('container_memory_usage_bytes', usage, 'Container memory in use')
+        out.add('container_memory_limit_bytes', limit, 'Container memory limit')
+
+        for path in self.disk_paths:
+            used, total = procfs.disk_usage(path)
+            out.add('disk_used_bytes', used, 'Used bytes on the filesystem', path=path)
+            out.add('disk_total_bytes', total, 'Size of the filesystem', path=path)
+
+        for port in procfs.listening_ports():
+            out.add('tcp_listening_port', 1, 'TCP port in LISTEN state', port=port)
+
+        for collector in self.collectors:
+            try:
+                collector(out)
+            except Exception:
+                pass
+
+        out.add('metrics_sample_duration_seconds', round(time.monotonic() - begin, 4),
+                'Time spent collecting this sample')
+        out.add('metrics_sampled_at_seconds', round(time.time(), 3),
+                'Unix time of this sample')
+
+        text = out.render()
+        with self.lock:
+            self.text = text
+
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.sample()
+            except Exception:
+                pass
+
+    def render(self):
+        with self.lock:
+            return self.text
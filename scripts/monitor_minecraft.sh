@@ -21,14 +21,23 @@ echo "------------"
 ls -la /home/coder/logs/*.log 2>/dev/null || echo "No log files found"
 
 echo ""
-echo "📈 Recent Minecraft Logs:"
-echo "------------------------"
-tail -20 /home/coder/logs/minecraft_automation.log 2>/dev/null || echo "Log file not found"
+echo "📈 Recent Automation Logs:"
+echo "-------------------------"
+tail -20 /home/coder/logs/colab_automation.log 2>/dev/null || echo "Log file not found"
 
 echo ""
-echo "🖥️ Screen Sessions:"
-echo "-----------------"
-screen -ls
+echo "📜 Events (last 24h):"
+echo "--------------------"
+curl -s "http://localhost:8081/events?since=$(( $(date +%s) - 86400 ))" 2>/dev/null \
+    | python3 -c 'import json, sys, time
+for e in json.load(sys.stdin)["events"]:
+    print(time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(e["ts"])), e["type"].ljust(16), e["line"][-80:])' \
+    2>/dev/null || echo "Health server not reachable"
+
+echo ""
+echo "🖥️ Supervised Services:"
+echo "----------------------"
+python3 "$(dirname "$0")/supervisor.py" --status 2>/dev/null || echo "Supervisor not running"
 
 echo ""
 echo "🌐 Network Connections:"
@@ -7,40 +7,148 @@ This script will open your Colab notebook and run the Minecraft server
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 import time
 import random
+import json
 import logging
 import os
-import pickle
-import subprocess
+import signal
 import sys
+import threading
+
+import procfs
+from cdp_driver import CdpDriver
+import profiling
+from config import Config, ConfigError
+from cookie_store import CookieStore
+from driver_stats import DriverStats
+from locators import LocatorRegistry
+from log_setup import setup_logging
+from memory_watchdog import MB, MemoryWatchdog
+from colab_probe import RuntimeStatus, probe_runtime
+from scheduler import Scheduler
+from screenshot_store import ScreenshotStore
+import shutdown
+from shutdown import ShutdownRequested
+from timeseries import TimeSeriesStore
+from waits import wait_for
+
+# A memory recycle waits until no other keep-alive task is due within this many seconds
+QUIET_MARGIN = 30
+# Cookies saved more recently than this are not captured again on start
+COOKIE_FRESH_SECONDS = 3600
+
+# Browser resource profiles. "low" trades a few page niceties for memory so
+# Chrome stops pushing code-server into the OOM killer on the free tier.
+BROWSER_PROFILES = {
+    'standard': {
+        'args': [],
+        'prefs': {},
+        'blocked_urls': [],
+    },
+    'low': {
+        'args': [
+            '--disable-background-networking',
+            '--disable-component-update',
+            '--disable-extensions',
+            '--disable-default-apps',
+            '--disable-sync',
+            '--disable-features=Translate,MediaRouter,OptimizationHints,AutofillServerCommunication',
+            '--no-first-run',
+            '--mute-audio',
+            '--renderer-process-limit=2',
+            '--js-flags=--max-old-space-size=512',
+            '--disk-cache-size=33554432',  # 32 MB
+            '--media-cache-size=1',
+        ],
+        'prefs': {
+            'profile.managed_default_content_settings.images': 2,
+            'profile.managed_default_content_settings.media_stream': 2,
+        },
+        # Fonts cannot be switched off through prefs, so block them over DevTools
+        'blocked_urls': ['*.woff', '*.woff2', '*.ttf', '*.otf', 'fonts.gstatic.com/*'],
+    },
+}
+
+# How the browser is driven: chromedriver (WebDriver over HTTP) or Chrome's
+# DevTools websocket directly, which skips the chromedriver process entirely
+DRIVER_BACKENDS = {
+    'selenium': webdriver.Chrome,
+    'cdp': CdpDriver,
+}
+IMAGE_URL_PATTERNS = ['*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico']
+
+# Candidate selectors per button, tried in one script call (locators.py)
+COLAB_LOCATORS = {
+    'connect_button': [
+        "//span[contains(text(), 'Connect')]",
+        "//button[contains(@aria-label, 'Connect')]",
+        "//div[contains(text(), 'Connect')]",
+    ],
+    'run_all_button': [
+        "//button[contains(@aria-label, 'Run all')]",
+        "//span[contains(text(), 'Run all')]",
+        "//div[contains(text(), 'Run all')]",
+    ],
+}
 
-# Setup logging
-os.makedirs('/home/coder/logs', exist_ok=True)
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('/home/coder/logs/colab_automation.log'),
-        logging.StreamHandler()
-    ]
-)
 
 class ColabMinecraftAutomator:
-    def __init__(self):
-        self.driver = None
-        # CHANGE THIS TO YOUR COLAB NOTEBOOK URL
-        self.colab_url = "https://colab.research.google.com/drive/1jckV8xUJSmLhhol6wZwVJzpybsimiRw1"
-        self.cookies_file = '/home/coder/.cookies/google_cookies.pkl'
-        self.setup_browser()
+    def __init__(self, browser_profile=None, driver=None, driver_factory=None, log_dir=None, backend=None,
+                 config=None):
+        # Paths, intervals and budgets (config.py); the arguments override it
+        self.config = config or Config()
+        log_dir = log_dir or self.config.log_dir
+        # Every WebDriver command is timed per calling method (driver_stats: false to skip)
+        self.driver_stats = DriverStats(__file__, enabled=self.config.driver_stats)
+        self.driver_stats_file = os.path.join(log_dir, 'webdriver_stats.json')
+        # driver/driver_factory let the offline bench run against a fake WebDriver
+        self.driver = self.driver_stats.wrap(driver)
+        self.locators = LocatorRegistry(COLAB_LOCATORS)
+        self.backend = backend or self.config.driver_backend
+        if self.backend not in DRIVER_BACKENDS:
+            logging.warning(f"⚠ Unknown driver backend '{self.backend}', using selenium")
+            self.backend = 'selenium'
+        self.driver_factory = driver_factory or DRIVER_BACKENDS[self.backend]
+        self.started = time.monotonic()
+        self.browser_profile = browser_profile or self.config.browser_profile
+        # SET colab_url IN THE CONFIG FILE TO YOUR COLAB NOTEBOOK URL
+        self.colab_url = self.config.colab_url
+        self.cookies = CookieStore(self.config.cookie_file)
+        # Persistent profile so disk cache and session survive a browser relaunch
+        self.user_data_dir = self.config.user_data_dir
+        self.scheduler = None
+        self.screenshots = ScreenshotStore(os.path.join(log_dir, 'screenshots'))
+        # Status/latency/RSS history, read by the health server's /history
+        self.history = TimeSeriesStore(os.path.join(log_dir, 'history.ring'))
+        # Planned reload/tab swap when Chrome grows past its memory limits
+        self.memory = MemoryWatchdog(rss_limit=int(self.config.chrome_rss_limit_mb * MB),
+                                     heap_limit=int(self.config.chrome_heap_limit_mb * MB),
+                                     cooldown=self.config.chrome_recycle_cooldown)
+        # Per-tier recovery stats: attempts, successes, total seconds
+        self.recovery_stats = {tier: {"attempts": 0, "successes": 0, "seconds": 0.0}
+                               for tier in ('tab', 'relaunch')}
+        # Last runtime state seen, and the previous run's snapshot if it is recent
+        self.last_status = None
+        self.last_status_at = None
+        self.state_file = os.path.join(log_dir, 'automator_state.json')
+        self.warm_state = self.load_state()
+        if self.driver is None:
+            # A runtime that was up at shutdown means the profile still holds the session
+            self.setup_browser(load_cookies=not self.warm_connected())
         
-    def setup_browser(self):
+    def setup_browser(self, load_cookies=True):
         """Setup headless Chrome browser optimized for Colab"""
         chrome_options = Options()
         
+        # Reuse the same profile directory across launches; never share it with a live Chrome
+        owner = procfs.clear_profile_locks(self.user_data_dir)
+        if owner is not None:
+            logging.error(f"❌ Failed to start browser: {self.user_data_dir} is in use by Chrome (pid {owner})")
+            return False
+        chrome_options.add_argument(f'--user-data-dir={self.user_data_dir}')
+        
         # Headless mode (no display needed)
         chrome_options.add_argument('--headless=new')
         chrome_options.add_argument('--no-sandbox')
@@ -54,6 +162,12 @@ class ColabMinecraftAutomator:
         chrome_options.add_argument('--disable-blink-features=AutomationControlled')
         
         # Performance optimizations
+        profile = BROWSER_PROFILES.get(self.browser_profile)
+        if profile is None:
+            logging.warning(f"⚠ Unknown browser profile '{self.browser_profile}', using standard")
+            self.browser_profile, profile = 'standard', BROWSER_PROFILES['standard']
+        for arg in profile['args']:
+            chrome_options.add_argument(arg)
         prefs = {
             'profile.default_content_setting_values': {
                 'images': 2,  # Block images to save RAM
@@ -61,67 +175,88 @@ class ColabMinecraftAutomator:
                 'plugins': 2,
             }
         }
+        prefs.update(profile['prefs'])
         chrome_options.add_experimental_option('prefs', prefs)
         
         # User agent
         chrome_options.add_argument('--user-agent=Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
         
         try:
-            self.driver = webdriver.Chrome(options=chrome_options)
-            logging.info("✅ Browser started successfully")
+            launch_start = time.monotonic()
+            self.driver = self.driver_stats.wrap(self.driver_factory(options=chrome_options))
+            launch_time = time.monotonic() - launch_start
             
-            # Load saved cookies if they exist
-            if os.path.exists(self.cookies_file):
+            self.block_urls()
+            
+            logging.info(f"✅ Browser started successfully "
+                         f"(profile={self.browser_profile}, backend={self.backend}, {launch_time:.2f}s, "
+                         f"RSS {self.browser_rss() / 1048576:.0f} MB)")
+            
+            # Load saved cookies if they exist (before the first navigation)
+            if load_cookies and self.cookies.exists():
                 self.load_cookies()
-                logging.info("✅ Cookies loaded from file")
                 
             return True
         except Exception as e:
             logging.error(f"❌ Failed to start browser: {e}")
             return False
     
+    def block_urls(self):
+        """Apply the profile's URL blocklist to the current tab (CDP settings are per tab)"""
+        blocked_urls = list(BROWSER_PROFILES[self.browser_profile]['blocked_urls'])
+        if self.backend == 'cdp':
+            # Content-setting prefs need chromedriver; block images by URL instead
+            blocked_urls += IMAGE_URL_PATTERNS
+        if not blocked_urls:
+            return
+        try:
+            self.driver.execute_cdp_cmd('Network.enable', {})
+            self.driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': blocked_urls})
+        except Exception as e:
+            logging.debug(f"Could not set blocked URLs: {e}")
+    
+    def browser_rss(self):
+        """RSS in bytes of chromedriver plus every Chrome process it spawned"""
+        try:
+            return procfs.tree_rss(self.driver.service.process.pid)
+        except Exception:
+            return 0
+    
     def load_cookies(self):
-        """Load saved cookies"""
+        """Load saved cookies, one bulk DevTools call per domain"""
         try:
-            with open(self.cookies_file, 'rb') as f:
-                cookies = pickle.load(f)
-                for cookie in cookies:
-                    try:
-                        self.driver.add_cookie(cookie)
-                    except:
-                        pass
-            return True
-        except:
+            stats = self.cookies.inject(self.driver)
+            logging.info(f"✅ Cookies loaded from file "
+                         f"({stats['loaded']} loaded, {stats['skipped']} skipped, {stats['expired']} expired)")
+            return stats['loaded'] > 0
+        except Exception as e:
+            logging.warning(f"⚠ Could not load cookies: {e}")
             return False
     
     def save_cookies(self):
         """Save cookies to file"""
         try:
-            os.makedirs(os.path.dirname(self.cookies_file), exist_ok=True)
-            with open(self.cookies_file, 'wb') as f:
-                pickle.dump(self.driver.get_cookies(), f)
-            logging.info("✅ Cookies saved")
+            count = self.cookies.save_from(self.driver)
+            logging.info(f"✅ Cookies saved ({count})")
             return True
-        except:
+        except Exception as e:
+            logging.warning(f"⚠ Could not save cookies: {e}")
             return False
     
     def is_logged_in(self):
         """Check if we're logged in to Google"""
+        # No stored session cookie means no point loading a page to find out
+        if not self.cookies.has_session():
+            return False
         try:
             # Go to a Google page that requires login
             self.driver.get("https://myaccount.google.com/")
-            time.sleep(2)
+            status = wait_for(
+                lambda: self._status_if(lambda s: s.ready == 'complete' or not s.logged_in),
+                timeout=15, step="is_logged_in")
             
-            # If we're redirected to login page, we're not logged in
-            if "accounts.google.com" in self.driver.current_url:
-                return False
-            
-            # Check for login indicators
-            page_source = self.driver.page_source.lower()
-            if "sign in" in page_source or "log in" in page_source:
-                return False
-                
-            return True
+            # Redirect to accounts.google.com or a sign-in form means logged out
+            return (status or self.get_status()).logged_in
         except:
             return False
     
@@ -129,7 +264,10 @@ class ColabMinecraftAutomator:
         """Open Colab notebook"""
         logging.info("🌐 Opening Colab notebook...")
         self.driver.get(self.colab_url)
-        time.sleep(5)
+        # Ready once the runtime widget is rendered or we got bounced to login
+        wait_for(
+            lambda: self._status_if(lambda s: s.has_widget or not s.logged_in),
+            timeout=30, step="open_colab")
         
         # Check if we need to login
         if "accounts.google.com" in self.driver.current_url:
@@ -144,28 +282,32 @@ class ColabMinecraftAutomator:
         """Connect to Colab runtime"""
         try:
             # Look for "Connect" button
-            connect_xpaths = [
-                "//span[contains(text(), 'Connect')]",
-                "//button[contains(@aria-label, 'Connect')]",
-                "//div[contains(text(), 'Connect')]"
-            ]
-            
-            for xpath in connect_xpaths:
+            clicked = False
+            button = self.locators.find(self.driver, 'connect_button')
+            if button is not None:
                 try:
-                    connect_buttons = self.driver.find_elements(By.XPATH, xpath)
-                    if connect_buttons:
-                        logging.info("🔗 Clicking Connect button...")
-                        connect_buttons[0].click()
-                        time.sleep(10)
-                        break
-                except:
-                    continue
+                    logging.info("🔗 Clicking Connect button...")
+                    button.click()
+                    clicked = True
+                except Exception as e:
+                    logging.debug(f"Connect button not clickable: {e}")
+                    self.locators.invalidate('connect_button')
             
-            # Check if connected
-            time.sleep(3)
-            page_text = self.driver.page_source.lower()
-            if "connected" in page_text or "runtime" in page_text:
-                logging.info("✅ Runtime connected")
+            # Check if connected: wait for the widget to settle instead of a fixed sleep.
+            # Right after a click the label may still read "Connect", so wait for an outcome.
+            if clicked:
+                done = lambda s: s.state in (RuntimeStatus.CONNECTED, RuntimeStatus.DISCONNECTED,
+                                             RuntimeStatus.LOGIN_REQUIRED)
+            else:
+                done = lambda s: s.settled
+            status = wait_for(
+                lambda: self._status_if(done),
+                timeout=60 if clicked else 10, step="connect_to_runtime")
+            if status is None:
+                status = self.get_status()
+            self.note_status(status.state)
+            if status.connected:
+                logging.info("✅ Runtime connected", extra={"event": "connected"})
                 return True
             else:
                 # Try to run all cells
@@ -179,36 +321,33 @@ class ColabMinecraftAutomator:
         """Run all cells in the notebook"""
         try:
             # Look for "Run all" button
-            run_all_xpaths = [
-                "//button[contains(@aria-label, 'Run all')]",
-                "//span[contains(text(), 'Run all')]",
-                "//div[contains(text(), 'Run all')]"
-            ]
-            
-            for xpath in run_all_xpaths:
-                try:
-                    run_all_buttons = self.driver.find_elements(By.XPATH, xpath)
-                    if run_all_buttons:
-                        logging.info("▶ Clicking 'Run all' button...")
-                        run_all_buttons[0].click()
-                        time.sleep(15)
-                        logging.info("✅ All cells running")
-                        return True
-                except:
-                    continue
-            
-            return False
+            button = self.locators.find(self.driver, 'run_all_button')
+            if button is None:
+                return False
+            try:
+                logging.info("▶ Clicking 'Run all' button...")
+                button.click()
+            except Exception as e:
+                logging.debug(f"'Run all' button not clickable: {e}")
+                self.locators.invalidate('run_all_button')
+                return False
+            # Run all allocates a runtime first; wait until it has left "Connect"
+            wait_for(
+                lambda: self._status_if(
+                    lambda s: s.state in (RuntimeStatus.CONNECTING, RuntimeStatus.CONNECTED)),
+                timeout=30, step="run_all_cells")
+            logging.info("✅ All cells running")
+            return True
         except Exception as e:
             logging.error(f"Error running cells: {e}")
             return False
     
     def take_screenshot(self, name):
-        """Save screenshot for debugging"""
+        """Save screenshot for debugging (deduplicated, size/age bounded)"""
         try:
-            timestamp = int(time.time())
-            path = f"/home/coder/logs/{name}_{timestamp}.png"
-            self.driver.save_screenshot(path)
-            logging.debug(f"📸 Screenshot: {path}")
+            path = self.screenshots.capture(self.driver, name)
+            if path:
+                logging.debug(f"📸 Screenshot: {path}")
         except:
             pass
     
@@ -258,94 +397,344 @@ class ColabMinecraftAutomator:
         """Main loop to keep session alive"""
         logging.info("🛡️ Starting keep-alive protection...")
         
-        last_activity = time.time()
-        last_check = time.time()
-        last_screenshot = time.time()
+        self.scheduler = self.build_scheduler(self.warm_timers())
         
-        while True:
+        while not shutdown.requested():
             try:
-                current_time = time.time()
-                
-                # Human activity every 1-3 minutes
-                if current_time - last_activity > random.uniform(60, 180):
-                    self.human_like_activity()
-                    last_activity = current_time
-                    logging.info(f"🕒 [{time.strftime('%H:%M:%S')}] Session active")
-                
-                # Check runtime every 5 minutes
-                if current_time - last_check > 300:
-                    if not self.check_runtime_status():
-                        logging.warning("⚠ Runtime disconnected, reconnecting...")
-                        self.connect_to_runtime()
-                    last_check = current_time
-                
-                # Screenshot every 30 minutes
-                if current_time - last_screenshot > 1800:
-                    self.take_screenshot("periodic_check")
-                    last_screenshot = current_time
-                
-                # Refresh page every 60-90 minutes (random)
-                if random.random() < 0.001:  # ~1% chance each loop
-                    logging.info("🔄 Refreshing page...")
-                    self.driver.refresh()
-                    time.sleep(8)
-                    self.connect_to_runtime()
-                
-                time.sleep(10)  # Small delay between loops
-                
-            except KeyboardInterrupt:
-                logging.info("🛑 Stopped by user")
-                break
+                # Sleeps until the next task deadline, then runs whatever is due;
+                # SIGTERM/SIGINT raise ShutdownRequested out of the sleep
+                self.scheduler.run(until=shutdown.requested)
             except Exception as e:
                 logging.error(f"❌ Error in keep-alive: {e}")
                 self.recover()
     
+    def build_scheduler(self, timers=None):
+        """Keep-alive tasks and their cadence; timers resumes first runs from a snapshot"""
+        timers = timers or {}
+        config = self.config
+        scheduler = Scheduler()
+        # Human activity every 1-3 minutes
+        scheduler.add('activity', self.activity_tick,
+                      interval=config.activity_interval, jitter=config.activity_jitter)
+        # Check runtime every 5 minutes
+        scheduler.add('runtime_check', self.runtime_check_tick, interval=config.runtime_check_interval,
+                      first_delay=timers.get('runtime_check'))
+        # Screenshot every 30 minutes
+        scheduler.add('screenshot', lambda: self.take_screenshot("periodic_check"),
+                      interval=config.screenshot_interval, first_delay=timers.get('screenshot'))
+        # Refresh page every 60-90 minutes
+        scheduler.add('refresh', self.refresh_page,
+                      interval=config.refresh_interval, jitter=config.refresh_jitter,
+                      first_delay=timers.get('refresh'))
+        # Chrome RSS / JS heap every 2 minutes, recycling the tab when too big
+        scheduler.add('memory_check', self.memory_check_tick, interval=config.memory_check_interval)
+        # Bookkeeping below only touches files: a failure is logged, never a reason to recover the tab
+        # Persist the status history every minute
+        scheduler.add('history_flush', self.history.flush, interval=60, escalate=False)
+        # State snapshot for a warm start, also after a hard kill; carries the task timings to /metrics
+        scheduler.add('state_snapshot', self.save_state, interval=60, escalate=False)
+        # WebDriver timings for the health server's /metrics and driver_stats.py
+        if self.driver_stats.enabled:
+            scheduler.add('driver_stats', lambda: self.driver_stats.dump(
+                self.driver_stats_file, locators=self.locators.stats()), interval=60, escalate=False)
+        return scheduler
+    
+    def on_config_change(self, changes):
+        """Config reloaded (watcher thread): hand the update to the keep-alive loop"""
+        if self.scheduler is not None:
+            self.scheduler.call_soon(self.apply_config)
+        else:
+            self.apply_config()
+    
+    def apply_config(self):
+        """Push live config values into the running scheduler and memory watchdog"""
+        config = self.config
+        self.memory.rss_limit = int(config.chrome_rss_limit_mb * MB)
+        self.memory.heap_limit = int(config.chrome_heap_limit_mb * MB)
+        self.memory.cooldown = config.chrome_recycle_cooldown
+        if self.scheduler is None:
+            return
+        for name, interval, jitter in (
+                ('activity', config.activity_interval, config.activity_jitter),
+                ('runtime_check', config.runtime_check_interval, None),
+                ('screenshot', config.screenshot_interval, None),
+                ('refresh', config.refresh_interval, config.refresh_jitter),
+                ('memory_check', config.memory_check_interval, None)):
+            self.scheduler.set_interval(name, interval, jitter)
+    
+    def activity_tick(self):
+        self.human_like_activity()
+        logging.info(f"🕒 [{time.strftime('%H:%M:%S')}] Session active")
+    
+    def runtime_check_tick(self):
+        if not self.check_runtime_status():
+            logging.warning("⚠ Runtime disconnected, reconnecting...", extra={"event": "disconnected"})
+            begin = time.monotonic()
+            self.connect_to_runtime()
+            self.history.record('reconnect_seconds', time.monotonic() - begin)
+    
+    def memory_check_tick(self):
+        sample = self.memory.sample(self.driver)
+        self.history.record('chrome_rss_bytes', sample.rss)
+        action = self.memory.action(sample)
+        if action is None:
+            return
+        if not self.quiet_window():
+            logging.info(f"⏳ Chrome over memory limit ({sample.describe()}), waiting for a quiet moment")
+            self.scheduler.reschedule('memory_check', QUIET_MARGIN)
+            return
+        self.recycle_tab(action, sample)
+    
+    def quiet_window(self):
+        """No other keep-alive task due soon and the runtime is not mid-connect"""
+        upcoming = self.scheduler.time_until_next()
+        if upcoming is not None and upcoming < QUIET_MARGIN:
+            return False
+        try:
+            return self.get_status().connected
+        except Exception:
+            return False
+    
+    def recycle_tab(self, action, before):
+        """Planned reset: reload the page or move the notebook to a fresh tab"""
+        logging.info(f"♻ Recycling tab via {action} ({before.describe()})")
+        begin = time.monotonic()
+        if action == 'reload':
+            self.refresh_page()
+        elif not self.recover_in_session():
+            self.recover()
+        elapsed = time.monotonic() - begin
+        after = self.memory.sample(self.driver)
+        reclaimed = self.memory.record(action, before, after)
+        logging.info(f"♻ Recycled via {action} in {elapsed:.1f}s: {before.describe()} -> {after.describe()} "
+                     f"(reclaimed {reclaimed / MB:.0f} MB, {self.memory.reclaimed_bytes / MB:.0f} MB total)",
+                     extra={"event": "memory_recycle", "step": action, "duration": elapsed})
+        # The page was just reloaded; no need for the periodic refresh soon after
+        self.scheduler.postpone('refresh')
+    
+    def refresh_page(self):
+        logging.info("🔄 Refreshing page...")
+        self.driver.refresh()
+        wait_for(
+            lambda: self._status_if(lambda s: s.has_widget or not s.logged_in),
+            timeout=30, step="refresh")
+        self.connect_to_runtime()
+    
+    def get_status(self):
+        """Probe the page for runtime/login state in a single script call"""
+        return probe_runtime(self.driver)
+    
+    def _status_if(self, predicate):
+        """Return the current status if predicate(status) holds, else None (for wait_for)"""
+        status = self.get_status()
+        return status if predicate(status) else None
+    
     def check_runtime_status(self):
         """Check if runtime is still connected"""
+        begin = time.monotonic()
         try:
-            # Look for "Reconnect" button (indicates disconnection)
-            reconnect_elements = self.driver.find_elements(By.XPATH, "//*[contains(text(), 'Reconnect')]")
-            if reconnect_elements:
-                return False
-            
-            # Check page for "Connected" text
-            page_text = self.driver.page_source.lower()
-            if "disconnected" in page_text:
-                return False
-                
-            return True
+            status = self.get_status()
         except:
-            return False
+            up = False
+            self.note_status(RuntimeStatus.UNKNOWN)
+        else:
+            logging.debug(f"Runtime status: {status.as_dict()}")
+            self.note_status(status.state)
+            # "Reconnect", a disconnect dialog, a bare "Connect" or a login redirect
+            # all mean the runtime is gone; an unreadable page is not treated as a drop
+            up = status.state not in (
+                RuntimeStatus.DISCONNECTED,
+                RuntimeStatus.IDLE,
+                RuntimeStatus.LOGIN_REQUIRED,
+            )
+        self.history.record('check_latency_seconds', time.monotonic() - begin)
+        self.history.record('runtime_up', up)
+        return up
+    
+    def note_status(self, state):
+        self.last_status = state
+        self.last_status_at = time.time()
     
     def recover(self):
-        """Recover from errors"""
+        """Recover from errors, cheapest tier first"""
         logging.info("🔄 Attempting recovery...")
+        for tier, attempt in (('tab', self.recover_in_session), ('relaunch', self.recover_relaunch)):
+            stats = self.recovery_stats[tier]
+            stats["attempts"] += 1
+            begin = time.monotonic()
+            try:
+                ok = attempt()
+            except Exception as e:
+                logging.warning(f"⚠ Recovery tier '{tier}' failed: {e}")
+                ok = False
+            elapsed = time.monotonic() - begin
+            stats["seconds"] += elapsed
+            if ok:
+                stats["successes"] += 1
+                self.history.record('reconnect_seconds', elapsed)
+                logging.info(f"✅ Recovery successful via '{tier}' in {elapsed:.1f}s "
+                             f"({self.recovery_summary()})",
+                             extra={"event": "recovery", "step": tier, "duration": elapsed})
+                return True
+            logging.info(f"↪ Recovery tier '{tier}' did not help after {elapsed:.1f}s, escalating")
+        
+        logging.error(f"❌ Recovery failed ({self.recovery_summary()})", extra={"event": "recovery_failed"})
+        return False
+    
+    def recover_in_session(self):
+        """Tier 1: keep Chrome, open the notebook in a fresh tab and drop the old one"""
+        if not self.driver:
+            return False
+        old_handle = self.driver.current_window_handle
+        self.driver.switch_to.new_window('tab')
         try:
-            if self.driver:
-                self.driver.quit()
+            self.driver.switch_to.window(old_handle)
+            self.driver.close()
         except:
             pass
+        self.driver.switch_to.window(self.driver.window_handles[-1])
+        self.block_urls()
+        if not self.open_colab():
+            return False
+        return self.connect_to_runtime()
+    
+    def recover_relaunch(self):
+        """Tier 2: restart Chrome on the persistent profile"""
+        # quit(), then kill whatever is left: a stray Chrome would keep the profile locked
+        self.close_browser(timeout=10)
         
-        time.sleep(10)
-        
-        # Restart browser
-        if self.setup_browser():
+        # The profile keeps the session, so cookies don't need to be replayed
+        if self.setup_browser(load_cookies=False):
             if self.open_colab():
                 self.connect_to_runtime()
-                logging.info("✅ Recovery successful")
                 return True
-        
-        logging.error("❌ Recovery failed")
         return False
     
+    def recovery_summary(self):
+        tab, relaunch = self.recovery_stats['tab'], self.recovery_stats['relaunch']
+        return (f"tab {tab['successes']}/{tab['attempts']} ok, "
+                f"relaunch {relaunch['successes']}/{relaunch['attempts']} ok, "
+                f"cold restarts avoided: {tab['successes']}")
+    
+    def save_state(self):
+        """Snapshot what the next start can reuse: runtime state, timers, cookie age"""
+        state = {
+            "version": 1,
+            "saved_at": time.time(),
+            "colab_url": self.colab_url,
+            "runtime": {"state": self.last_status, "checked_at": self.last_status_at},
+            "timers": self.scheduler.deadlines() if self.scheduler else {},
+            # Per-task runs, failures and durations, exported by the health server's /metrics
+            "tasks": self.scheduler.stats() if self.scheduler else {},
+            "cookies_saved_at": self.cookies.saved_at(),
+        }
+        tmp = self.state_file + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp, self.state_file)
+    
+    def load_state(self):
+        """The previous run's snapshot, or None if missing, stale or for another notebook"""
+        try:
+            with open(self.state_file) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        age = time.time() - state.get("saved_at", 0)
+        if not 0 <= age <= self.config.warm_start_max_age or state.get("colab_url") != self.colab_url:
+            logging.info(f"❄ Ignoring state snapshot ({age:.0f}s old or for another notebook), cold start")
+            return None
+        state["age"] = age
+        return state
+    
+    def warm_connected(self):
+        return bool(self.warm_state) and self.warm_state["runtime"]["state"] == RuntimeStatus.CONNECTED
+    
+    def warm_timers(self):
+        """Snapshot deadlines minus the time spent down, so restarts don't reset long cadences"""
+        if not self.warm_state:
+            return {}
+        down = self.warm_state["age"]
+        return {name: max(0.0, left - down) for name, left in self.warm_state["timers"].items()}
+    
+    def retry_with_cookies(self):
+        """A warm start trusted the profile and skipped the cookie file; if its session
+        expired since, forget the snapshot and open Colab once more with the stored cookies"""
+        if not self.warm_connected():
+            return False
+        logging.warning("⚠ Profile session gone since the snapshot, retrying with the stored cookies")
+        # Otherwise every retry and supervisor restart within warm_start_max_age skips cookies again
+        self.warm_state = None
+        try:
+            os.unlink(self.state_file)
+        except OSError:
+            pass
+        if not self.cookies.exists() or not self.load_cookies():
+            return False
+        return self.open_colab()
+    
+    def cookies_fresh(self):
+        saved_at = self.cookies.saved_at()
+        return saved_at is not None and time.time() - saved_at < COOKIE_FRESH_SECONDS
+    
+    def shutdown(self, deadline=None):
+        """Persist state and close the browser; returns False if Chrome had to be killed"""
+        # Stay under the supervisor's 10s SIGTERM -> SIGKILL grace
+        deadline = deadline or self.config.shutdown_deadline
+        begin = time.monotonic()
+        for name, step in (('state', self.save_state), ('history', self.history.flush),
+                           ('driver stats', lambda: self.driver_stats.dump(
+                               self.driver_stats_file, locators=self.locators.stats()))):
+            try:
+                step()
+            except Exception as e:
+                logging.warning(f"⚠ Could not save {name} on shutdown: {e}")
+        return self.close_browser(deadline - (time.monotonic() - begin))
+    
+    def close_browser(self, timeout):
+        """driver.quit() within timeout seconds, then SIGKILL whatever is left of the tree"""
+        if not self.driver:
+            return True
+        try:
+            # Never ourselves, should the driver run in-process
+            pids = [pid for pid in procfs.process_tree(self.driver.service.process.pid) if pid != os.getpid()]
+        except Exception:
+            pids = []
+        deadline = time.monotonic() + max(timeout, 0.5)
+        # quit() can hang on a wedged chromedriver; run it where we can stop waiting
+        closer = threading.Thread(target=self._quit_driver, daemon=True)
+        closer.start()
+        closer.join(max(0.0, deadline - time.monotonic()))
+        # Chrome's children exit shortly after quit() returns; not worth wait_for here
+        while any(procfs.is_running(pid) for pid in pids) and time.monotonic() < deadline:
+            time.sleep(0.1)
+        leftover = [pid for pid in pids if procfs.is_running(pid)]
+        for pid in leftover:
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except OSError:
+                pass
+        if leftover:
+            logging.warning(f"⚠ Browser did not exit in time, killed {len(leftover)} processes")
+        return not leftover and not closer.is_alive()
+    
+    def _quit_driver(self):
+        try:
+            self.driver.quit()
+        except Exception as e:
+            logging.debug(f"driver.quit() failed: {e}")
+    
     def start(self):
-        """Start the automation"""
+        """Start the automation; False if it could not, True once the keep-alive loop ends"""
         logging.info("="*60)
         logging.info("🚀 STARTING MINECRAFT COLAB AUTOMATION")
         logging.info("="*60)
+        if self.warm_state:
+            logging.info(f"🔥 Warm start from a snapshot {self.warm_state['age']:.0f}s old "
+                         f"(runtime was {self.warm_state['runtime']['state']})")
         
         # Open Colab
-        if not self.open_colab():
+        if not self.open_colab() and not self.retry_with_cookies():
             logging.error("❌ Cannot open Colab")
             return False
         
@@ -354,37 +743,79 @@ class ColabMinecraftAutomator:
             logging.error("❌ Cannot connect to runtime")
             return False
         
-        # Save cookies for next time
-        self.save_cookies()
+        # Save cookies for next time, unless a recent run already did
+        if not self.cookies_fresh():
+            self.save_cookies()
         
-        logging.info("✅ Automation started successfully!")
+        kind = 'warm' if self.warm_state else 'cold'
+        elapsed = time.monotonic() - self.started
+        logging.info(f"✅ Automation started successfully! ({kind} start, ready in {elapsed:.1f}s)",
+                     extra={"event": "startup", "step": kind, "duration": elapsed})
         logging.info("💡 Minecraft server should be running in Colab")
         
         # Start keep-alive loop
         self.keep_alive_loop()
+        return True
 
 def main():
     """Main function with restart logic"""
+    try:
+        config = Config()
+    except ConfigError as e:
+        sys.exit(f"❌ Invalid config: {e}")
+    log_dir = config.log_dir
+    # Setup logging: handlers run on a background thread, files rotate and gzip
+    os.makedirs(log_dir, exist_ok=True)
+    setup_logging(
+        os.path.join(log_dir, 'colab_automation.log'),
+        json_file=os.environ.get('COLAB_JSON_LOG', os.path.join(log_dir, 'colab_events.jsonl')) or None,
+    )
+    # SIGUSR1: cProfile capture, SIGUSR2: tracemalloc diff (written to the log dir)
+    profiling.install(log_dir, 'automator')
+    
     max_retries = 5
     retry_count = 0
+    automator = None
     
-    while retry_count < max_retries:
-        try:
-            automator = ColabMinecraftAutomator()
-            automator.start()
-            retry_count = 0  # Reset on successful start
-        except KeyboardInterrupt:
-            logging.info("🛑 Manual shutdown requested")
-            break
-        except Exception as e:
-            logging.error(f"💀 Fatal error: {e}")
-            retry_count += 1
-            wait_time = min(60, retry_count * 30)
-            logging.info(f"🔄 Restarting in {wait_time} seconds... (Attempt {retry_count}/{max_retries})")
-            time.sleep(wait_time)
+    # SIGHUP or saving the config file applies new intervals/budgets without a restart
+    config.on_change(lambda changes: automator and automator.on_config_change(changes))
+    config.watch()
+    # SIGTERM (redeploys, supervisor) and SIGINT: save state, close Chrome, exit
+    shutdown.install()
+    
+    try:
+        while retry_count < max_retries:
+            if automator:
+                # The previous attempt's Chrome still holds the profile
+                automator.close_browser(config.shutdown_deadline)
+                automator = None
+            try:
+                automator = ColabMinecraftAutomator(config=config)
+                error = None if automator.start() else "automation did not start"
+            except Exception as e:
+                error = e
+            if error is None:
+                retry_count = 0  # Reset on successful start
+            else:
+                logging.error(f"💀 Fatal error: {error}", extra={"event": "fatal"})
+                retry_count += 1
+                wait_time = min(60, retry_count * 30)
+                logging.info(f"🔄 Restarting in {wait_time} seconds... (Attempt {retry_count}/{max_retries})")
+                time.sleep(wait_time)
+            # A swallowed ShutdownRequested still ends the loop
+            shutdown.check()
+    except ShutdownRequested:
+        logging.info(f"🛑 {shutdown.reason()} received, shutting down...")
+        clean = automator.shutdown() if automator else True
+        elapsed = shutdown.elapsed()
+        logging.info(f"🛑 Shutdown complete in {elapsed:.2f}s ({'clean' if clean else 'browser killed'})",
+                     extra={"event": "shutdown", "duration": elapsed})
+        return
     
     if retry_count >= max_retries:
         logging.error("❌ Maximum retries reached. Giving up.")
+        if automator:
+            automator.close_browser(config.shutdown_deadline)
 
 if __name__ == "__main__":
     main()
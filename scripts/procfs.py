@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+PROCFS HELPERS
+Read process state straight from /proc instead of forking ps/pgrep
+"""
+
+import os
+import socket
+
+PROC = '/proc'
+CLK_TCK = os.sysconf('SC_CLK_TCK')
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+
+
+def list_pids():
+    """Return all numeric PIDs currently in /proc"""
+    try:
+        return [int(entry) for entry in os.listdir(PROC) if entry.isdigit()]
+    except OSError:
+        return []
+
+
+def read_comm(pid):
+    """Return the process name (same value pgrep -x matches on)"""
+    try:
+        with open(f'{PROC}/{pid}/comm') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def find_pids(name):
+    """Equivalent of `pgrep -x name` without spawning a process"""
+    # comm is truncated to 15 chars by the kernel, so compare the same way
+    wanted = name[:15]
+    return [pid for pid in list_pids() if read_comm(pid) == wanted]
+
+
+def read_cmdline(pid):
+    """Return the command line as a single space-joined string"""
+    try:
+        with open(f'{PROC}/{pid}/cmdline', 'rb') as f:
+            return f.read().replace(b'\0', b' ').decode(errors='replace').strip()
+    except OSError:
+        return None
+
+
+def process_stats(pid):
+    """RSS, CPU seconds, thread count and open FDs for one process"""
+    try:
+        with open(f'{PROC}/{pid}/stat') as f:
+            stat = f.read()
+    except OSError:
+        return None
+    # The comm field may contain spaces/parens; everything after the last ')' is fixed
+    fields = stat[stat.rfind(')') + 2:].split()
+    # fields[0] is field 3 (state) in proc(5) numbering
+    utime, stime = int(fields[11]), int(fields[12])
+    try:
+        fds = len(os.listdir(f'{PROC}/{pid}/fd'))
+    except OSError:
+        fds = None  # other user's process
+    return {
+        "rss_bytes": int(fields[21]) * PAGE_SIZE,
+        "cpu_seconds": (utime + stime) / CLK_TCK,
+        "threads": int(fields[17]),
+        "fds": fds,
+    }
+
+
+def _read_int(path):
+    try:
+        with open(path) as f:
+            value = f.read().strip()
+    except OSError:
+        return None
+    return None if value == 'max' else int(value)
+
+
+def memory_usage():
+    """Container memory (usage, limit) in bytes from cgroup, falling back to /proc/meminfo"""
+    # cgroup v2, then v1
+    for usage_file, limit_file in (
+        ('/sys/fs/cgroup/memory.current', '/sys/fs/cgroup/memory.max'),
+        ('/sys/fs/cgroup/memory/memory.usage_in_bytes', '/sys/fs/cgroup/memory/memory.limit_in_bytes'),
+    ):
+        usage = _read_int(usage_file)
+        if usage is not None:
+            return usage, _read_int(limit_file)
+
+    meminfo = {}
+    try:
+        with open(f'{PROC}/meminfo') as f:
+            for line in f:
+                key, value = line.split(':', 1)
+                meminfo[key] = int(value.split()[0]) * 1024
+    except OSError:
+        return None, None
+    total = meminfo.get('MemTotal')
+    available = meminfo.get('MemAvailable', meminfo.get('MemFree', 0))
+    return (total - available if total else None), total
+
+
+def disk_usage(path):
+    """(used, total) bytes for the filesystem holding path"""
+    try:
+        st = os.statvfs(path)
+    except OSError:
+        return None, None
+    total = st.f_blocks * st.f_frsize
+    return total - st.f_bfree * st.f_frsize, total
+
+
+def listening_ports():
+    """Sorted TCP ports in LISTEN state, read from /proc/net/tcp{,6}"""
+    ports = set()
+    for table in ('tcp', 'tcp6'):
+        try:
+            with open(f'{PROC}/net/{table}') as f:
+                next(f)  # header
+                for line in f:
+                    parts = line.split()
+                    if parts[3] == '0A':  # TCP_LISTEN
+                        ports.add(int(parts[1].rsplit(':', 1)[1], 16))
+        except (OSError, StopIteration):
+            continue
+    return sorted(ports)
+
+
+def read_ppid(pid):
+    try:
+        with open(f'{PROC}/{pid}/stat') as f:
+            stat = f.read()
+    except OSError:
+        return None
+    return int(stat[stat.rfind(')') + 2:].split()[1])
+
+
+def is_running(pid):
+    """True while the process exists and is not a zombie waiting to be reaped"""
+    try:
+        with open(f'{PROC}/{pid}/stat') as f:
+            stat = f.read()
+    except OSError:
+        return False
+    return stat[stat.rfind(')') + 2:].split()[0] != 'Z'
+
+
+def process_tree(root_pid):
+    """root_pid plus all of its descendants, from one /proc walk"""
+    children = {}
+    for pid in list_pids():
+        ppid = read_ppid(pid)
+        if ppid is not None:
+            children.setdefault(ppid, []).append(pid)
+    tree, stack = [], [root_pid]
+    while stack:
+        pid = stack.pop()
+        tree.append(pid)
+        stack.extend(children.get(pid, ()))
+    return tree
+
+
+def tree_rss(root_pid):
+    """Summed RSS in bytes of a process and its descendants"""
+    total = 0
+    for pid in process_tree(root_pid):
+        stats = process_stats(pid)
+        if stats:
+            total += stats["rss_bytes"]
+    return total
+
+
+def profile_owner(user_data_dir):
+    """PID of a live Chrome holding the profile (SingletonLock -> 'host-pid'), else None"""
+    try:
+        target = os.readlink(os.path.join(user_data_dir, 'SingletonLock'))
+    except OSError:
+        return None
+    host, _, pid = target.rpartition('-')
+    if host == socket.gethostname() and pid.isdigit() and is_running(int(pid)):
+        return int(pid)
+    return None
+
+
+def clear_profile_locks(user_data_dir):
+    """
+    Remove the Singleton* lock files a killed Chrome leaves in the profile dir.
+    Nothing is removed while a live Chrome holds the profile; its PID is
+    returned instead (None once the locks are gone).
+    """
+    os.makedirs(user_data_dir, exist_ok=True)
+    owner = profile_owner(user_data_dir)
+    if owner is not None:
+        return owner
+    for name in ('SingletonLock', 'SingletonSocket', 'SingletonCookie'):
+        try:
+            os.unlink(os.path.join(user_data_dir, name))
+        except OSError:
+            pass
+    return None
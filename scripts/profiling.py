@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+ON-DEMAND PROFILING
+SIGUSR1 toggles a time-boxed cProfile capture, SIGUSR2 writes a tracemalloc
+diff against the previous snapshot. Results land in the logs directory:
+
+    kill -USR1 $(pgrep -f my_colab_automation.py)   # start, again to stop early
+    kill -USR2 $(pgrep -f health-server.py)         # first: baseline, then diffs
+"""
+
+import cProfile
+import io
+import logging
+import os
+import pstats
+import signal
+import threading
+import time
+import tracemalloc
+
+# Profiles stop on their own after this long
+PROFILE_SECONDS = float(os.environ.get('PROFILE_SECONDS', '60'))
+TRACEMALLOC_FRAMES = 10
+TOP_N = 30
+
+
+class SignalProfiler:
+    def __init__(self, log_dir, name, profile_seconds=PROFILE_SECONDS):
+        self.log_dir = log_dir
+        self.name = name
+        self.profile_seconds = profile_seconds
+        self.profilers = []      # main thread first, then threads started while profiling
+        self.profile_started = None
+        self.timer = None
+        self.snapshot = None
+        self.lock = threading.Lock()
+
+    def install(self):
+        signal.signal(signal.SIGUSR1, self.on_usr1)
+        signal.signal(signal.SIGUSR2, self.on_usr2)
+
+    def _path(self, kind, ext):
+        return os.path.join(self.log_dir, f"{kind}-{self.name}-{time.strftime('%Y%m%d-%H%M%S')}.{ext}")
+
+    # --------------------------------------------------------------- cProfile
+    def on_usr1(self, signum=None, frame=None):
+        # Runs on the main thread: cProfile only sees the thread that enables it
+        if self.profile_started is None:
+            self.start_profile()
+        else:
+            self.stop_profile()
+
+    def _profile_thread(self, *args):
+        # threading.setprofile hook: runs once in each new thread, then hands over to cProfile
+        profiler = cProfile.Profile()
+        with self.lock:
+            self.profilers.append(profiler)
+        profiler.enable()
+
+    def start_profile(self):
+        profiler = cProfile.Profile()
+        self.profilers = [profiler]
+        self.profile_started = time.monotonic()
+        threading.setprofile(self._profile_thread)
+        profiler.enable()
+        # Time box: deliver the stop on the main thread, like a second SIGUSR1
+        self.timer = threading.Timer(self.profile_seconds, os.kill, (os.getpid(), signal.SIGUSR1))
+        self.timer.daemon = True
+        self.timer.start()
+        logging.info(f"🔬 Profiling for up to {self.profile_seconds:.0f}s (SIGUSR1 again to stop)")
+
+    def stop_profile(self):
+        self.profilers[0].disable()
+        threading.setprofile(None)
+        self.timer.cancel()
+        elapsed = time.monotonic() - self.profile_started
+        self.profile_started = None
+        with self.lock:
+            profilers, self.profilers = self.profilers, []
+        # Writing the report is slow; keep it off the interrupted main thread
+        threading.Thread(target=self.write_profile, args=(profilers, elapsed), daemon=True).start()
+
+    def write_profile(self, profilers, elapsed):
+        try:
+            stats = pstats.Stats(profilers[0])
+            for profiler in profilers[1:]:
+                try:
+                    stats.add(profiler)
+                except (TypeError, ValueError):
+                    pass  # thread never executed anything
+            path = self._path('profile', 'prof')
+            stats.dump_stats(path)
+            text = io.StringIO()
+            stats.stream = text
+            stats.sort_stats('cumulative').print_stats(TOP_N)
+            with open(path[:-len('.prof')] + '.txt', 'w') as f:
+                f.write(text.getvalue())
+            logging.info(f"🔬 Profile of {elapsed:.1f}s ({len(profilers)} threads) written to {path}",
+                         extra={"event": "profile", "duration": elapsed})
+        except Exception as e:
+            logging.warning(f"⚠ Could not write profile: {e}")
+
+    # ------------------------------------------------------------- tracemalloc
+    def on_usr2(self, signum=None, frame=None):
+        threading.Thread(target=self.memory_snapshot, daemon=True).start()
+
+    def memory_snapshot(self):
+        try:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+                with self.lock:
+                    self.snapshot = tracemalloc.take_snapshot()
+                logging.info("🧠 tracemalloc started; send SIGUSR2 again for a diff")
+                return
+            current = tracemalloc.take_snapshot()
+            with self.lock:
+                previous, self.snapshot = self.snapshot, current
+            filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+            diff = current.filter_traces(filters).compare_to(previous.filter_traces(filters), 'lineno')
+            size, peak = tracemalloc.get_traced_memory()
+            path = self._path('tracemalloc', 'txt')
+            with open(path, 'w') as f:
+                f.write(f"traced {size / 1048576:.1f} MB, peak {peak / 1048576:.1f} MB\n")
+                for stat in diff[:TOP_N]:
+                    f.write(f"{stat}\n")
+            growth = sum(stat.size_diff for stat in diff)
+            logging.info(f"🧠 tracemalloc diff ({growth / 1024:+.0f} KB since last snapshot) written to {path}",
+                         extra={"event": "tracemalloc"})
+        except Exception as e:
+            logging.warning(f"⚠ Could not take tracemalloc snapshot: {e}")
+
+
+def install(log_dir, name, profile_seconds=PROFILE_SECONDS):
+    """Register SIGUSR1/SIGUSR2 handlers; call from the main thread"""
+    profiler = SignalProfiler(log_dir, name, profile_seconds)
+    profiler.install()
+    return profiler
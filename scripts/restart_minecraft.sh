@@ -1,26 +1,32 @@
 #!/bin/bash
+# The automator is owned by scripts/supervisor.py, which restarts it as soon as
+# it exits. This script only makes sure a supervisor runs it, and never starts
+# a second automator next to one that is already running.
+# Pass "restart" to force an automator restart.
 LOG_FILE="/home/coder/logs/restart.log"
+cd /home/coder/scripts
 
 echo "$(date): Checking Minecraft automation..." >> $LOG_FILE
 
-# Check if automation is running
-if ! screen -ls | grep -q "minecraft_automation"; then
-    echo "$(date): Minecraft automation not running, restarting..." >> $LOG_FILE
-    
-    # Kill any leftover processes
-    pkill -f chromedriver 2>/dev/null
-    pkill -f chrome 2>/dev/null
-    pkill -f "python.*colab" 2>/dev/null
-    
-    # Wait
-    sleep 5
-    
-    # Start automation in screen session
-    cd /home/coder/scripts
-    screen -dmS minecraft_automation python3 my_colab_automation.py
-    
-    echo "$(date): Restarted Minecraft automation" >> $LOG_FILE
-    echo "$(date): Screen session: $(screen -ls | grep minecraft)" >> $LOG_FILE
+STATUS=$(python3 supervisor.py --status 2>> $LOG_FILE)
+SUPERVISED=$(echo "$STATUS" | python3 -c 'import json, sys; print("automator" in json.load(sys.stdin))' 2>/dev/null)
+# An automator started by hand (python3 my_colab_automation.py) holds the same Chrome profile
+OTHER=$(pgrep -f "my_colab_automation\.py" | head -1)
+
+if [ "$SUPERVISED" = "True" ]; then
+    if [ "$1" = "restart" ]; then
+        echo "$(date): Asking supervisor to restart the automator" >> $LOG_FILE
+        python3 supervisor.py --restart automator >> $LOG_FILE 2>&1
+    else
+        echo "$(date): Automator is running under the supervisor" >> $LOG_FILE
+    fi
+elif [ -n "$OTHER" ]; then
+    echo "$(date): Automator already running outside the supervisor (pid $OTHER), leaving it alone" >> $LOG_FILE
+elif [ -n "$STATUS" ]; then
+    echo "$(date): Supervisor is running without the automator, adding it..." >> $LOG_FILE
+    python3 supervisor.py --start automator >> $LOG_FILE 2>&1
 else
-    echo "$(date): Minecraft automation is running" >> $LOG_FILE
+    echo "$(date): Supervisor not running, starting it..." >> $LOG_FILE
+    nohup python3 supervisor.py automator >> $LOG_FILE 2>&1 &
+    echo "$(date): Started supervisor (pid $!)" >> $LOG_FILE
 fi
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+DEADLINE SCHEDULER
+Periodic tasks kept in a heap ordered by next run time; sleeps until the next deadline
+"""
+
+import collections
+import heapq
+import logging
+import random
+import threading
+import time
+
+
+class PeriodicTask:
+    """
+    A callable that runs every interval + uniform(0, jitter) seconds. A failure
+    of an escalating task propagates out of Scheduler.run(); other failures are
+    logged and counted.
+    """
+
+    def __init__(self, name, func, interval, jitter=0.0, escalate=True):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.jitter = jitter
+        self.escalate = escalate
+        self.next_run = 0.0
+        self.entry = None  # id of the heap entry that is currently valid
+        self.runs = 0
+        self.failures = 0
+        self.last_duration = 0.0
+        self.total_duration = 0.0
+        self.max_duration = 0.0
+
+    def next_delay(self, rng):
+        """Delay until the following run, with jitter drawn once per run"""
+        if self.jitter:
+            return self.interval + rng.uniform(0, self.jitter)
+        return self.interval
+
+    def stats(self):
+        return {
+            "runs": self.runs,
+            "failures": self.failures,
+            "interval": self.interval,
+            "jitter": self.jitter,
+            "next_run": self.next_run,
+            "last_duration": round(self.last_duration, 3),
+            "total_duration": round(self.total_duration, 3),
+            "avg_duration": round(self.total_duration / self.runs, 3) if self.runs else 0.0,
+            "max_duration": round(self.max_duration, 3),
+        }
+
+
+class Scheduler:
+    """Runs PeriodicTasks in deadline order; clock/sleep/rng are injectable for tests"""
+
+    def __init__(self, clock=None, sleep=None, rng=None):
+        self.clock = clock or time.monotonic
+        self.sleep = sleep or self._wait
+        self.rng = rng or random.Random()
+        self.tasks = {}
+        self.heap = []
+        self.counter = 0  # tie-breaker so the heap never compares tasks
+        # Callbacks handed over by other threads, run by the loop between deadlines
+        self.pending = collections.deque()
+        self.wakeup = threading.Event()
+
+    def add(self, name, func, interval, jitter=0.0, first_delay=None, escalate=True):
+        """Register a task; by default its first run is one (jittered) interval from now"""
+        task = PeriodicTask(name, func, interval, jitter, escalate)
+        delay = task.next_delay(self.rng) if first_delay is None else first_delay
+        self.tasks[name] = task
+        self._push(task, self.clock() + delay)
+        return task
+
+    def _push(self, task, when):
+        task.next_run = when
+        self.counter += 1
+        task.entry = self.counter
+        heapq.heappush(self.heap, (when, self.counter, task))
+
+    def reschedule(self, name, delay=0.0):
+        """Move a task's next run to delay seconds from now"""
+        task = self.tasks[name]
+        self._push(task, self.clock() + delay)
+
+    def set_interval(self, name, interval, jitter=None):
+        """Change a task's cadence; a next run further out than the new interval is pulled in"""
+        task = self.tasks[name]
+        task.interval = interval
+        if jitter is not None:
+            task.jitter = jitter
+        latest = self.clock() + task.interval + task.jitter
+        if task.next_run > latest:
+            self._push(task, self.clock() + task.next_delay(self.rng))
+
+    def call_soon(self, func):
+        """Run func on the scheduler's thread before its next sleep; safe from any thread"""
+        self.pending.append(func)
+        self.wakeup.set()
+
+    def _wait(self, seconds):
+        # Default sleep: call_soon() cuts it short
+        self.wakeup.wait(seconds)
+        self.wakeup.clear()
+
+    def _run_callbacks(self):
+        while self.pending:
+            func = self.pending.popleft()
+            try:
+                func()
+            except Exception as e:
+                logging.warning(f"⚠ Scheduler callback failed: {e}")
+
+    def postpone(self, name):
+        """Push a task's next run a full (jittered) interval from now, e.g. after doing its job early"""
+        task = self.tasks[name]
+        self._push(task, self.clock() + task.next_delay(self.rng))
+
+    def _pop_live(self):
+        """Drop heap entries made obsolete by reschedule()"""
+        while self.heap:
+            _, entry_id, task = self.heap[0]
+            if self.tasks.get(task.name) is task and task.entry == entry_id:
+                return self.heap[0]
+            heapq.heappop(self.heap)
+        return None
+
+    def deadlines(self):
+        """Seconds until each task's next run, e.g. to carry cadence across a restart"""
+        now = self.clock()
+        return {name: max(0.0, task.next_run - now) for name, task in self.tasks.items()}
+
+    def time_until_next(self):
+        entry = self._pop_live()
+        if entry is None:
+            return None
+        return max(0.0, entry[0] - self.clock())
+
+    def run_pending(self):
+        """Run every task whose deadline has passed; returns how many ran"""
+        ran = 0
+        while True:
+            entry = self._pop_live()
+            if entry is None or entry[0] > self.clock():
+                return ran
+            heapq.heappop(self.heap)
+            task = entry[2]
+            # Schedule the next run before executing, so a failing task keeps its cadence
+            self._push(task, self.clock() + task.next_delay(self.rng))
+            self._run(task)
+            ran += 1
+
+    def _run(self, task):
+        start = self.clock()
+        try:
+            task.func()
+        except Exception as e:
+            task.failures += 1
+            if task.escalate:
+                raise
+            logging.warning(f"⚠ {task.name} failed: {e}", extra={"event": "task_failed", "step": task.name})
+        finally:
+            duration = self.clock() - start
+            task.runs += 1
+            task.last_duration = duration
+            task.total_duration += duration
+            task.max_duration = max(task.max_duration, duration)
+            logging.debug(f"⏲ {task.name} took {duration:.2f}s",
+                          extra={"event": "task", "step": task.name, "duration": duration})
+
+    def run(self, until=None):
+        """Sleep until each deadline and run due tasks; until() returning True stops the loop"""
+        while until is None or not until():
+            self._run_callbacks()
+            delay = self.time_until_next()
+            if delay is None:
+                return
+            if delay > 0 and not self.pending:
+                self.sleep(delay)
+            self._run_callbacks()
+            self.run_pending()
+
+    def stats(self):
+        return {name: task.stats() for name, task in self.tasks.items()}
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+SCREENSHOT STORE
+Compact, deduplicated screenshots with a total-size and max-age budget
+"""
+
+import base64
+import json
+import logging
+import os
+import struct
+import time
+import zlib
+
+# Full captures: downscaled WebP straight from Chrome (no imaging library needed)
+CAPTURE_FORMAT = 'webp'
+CAPTURE_QUALITY = 50
+CAPTURE_SCALE = 0.5
+# Perceptual hash grid: 17x9 grayscale -> 16x9 = 144-bit dHash. Chrome's thumbnail
+# is at least this big (its aspect follows the viewport) and is sampled down to it.
+HASH_WIDTH = 17
+HASH_HEIGHT = 9
+# Frames whose hashes differ in at most this many bits count as unchanged
+DUPLICATE_DISTANCE = 6
+
+
+def _decode_png_gray(data):
+    """Decode a small 8-bit non-interlaced PNG into rows of grayscale values"""
+    if data[:8] != b'\x89PNG\r\n\x1a\n':
+        raise ValueError("not a PNG")
+    pos, idat = 8, []
+    width = height = color_type = None
+    while pos < len(data):
+        length, kind = struct.unpack('>I4s', data[pos:pos + 8])
+        body = data[pos + 8:pos + 8 + length]
+        pos += 12 + length
+        if kind == b'IHDR':
+            width, height, depth, color_type, _, _, interlace = struct.unpack('>IIBBBBB', body)
+            if depth != 8 or interlace:
+                raise ValueError("unsupported PNG layout")
+        elif kind == b'IDAT':
+            idat.append(body)
+        elif kind == b'IEND':
+            break
+    channels = {0: 1, 2: 3, 4: 2, 6: 4}[color_type]
+    raw = zlib.decompress(b''.join(idat))
+    stride = width * channels
+    rows, prev = [], bytearray(stride)
+    for y in range(height):
+        offset = y * (stride + 1)
+        ftype = raw[offset]
+        line = bytearray(raw[offset + 1:offset + 1 + stride])
+        for i in range(stride):
+            left = line[i - channels] if i >= channels else 0
+            up = prev[i]
+            if ftype == 1:
+                line[i] = (line[i] + left) & 0xFF
+            elif ftype == 2:
+                line[i] = (line[i] + up) & 0xFF
+            elif ftype == 3:
+                line[i] = (line[i] + ((left + up) >> 1)) & 0xFF
+            elif ftype == 4:
+                upleft = prev[i - channels] if i >= channels else 0
+                p = left + up - upleft
+                pa, pb, pc = abs(p - left), abs(p - up), abs(p - upleft)
+                pred = left if pa <= pb and pa <= pc else up if pb <= pc else upleft
+                line[i] = (line[i] + pred) & 0xFF
+        prev = line
+        if channels >= 3:
+            rows.append([(line[x] * 299 + line[x + 1] * 587 + line[x + 2] * 114) // 1000
+                         for x in range(0, stride, channels)])
+        else:
+            rows.append([line[x] for x in range(0, stride, channels)])
+    return rows
+
+
+def dhash(png_bytes):
+    """Difference hash of a small PNG thumbnail on a HASH_WIDTH x HASH_HEIGHT grid, as an int"""
+    rows = _decode_png_gray(png_bytes)
+    height, width = len(rows), len(rows[0])
+    if width < HASH_WIDTH or height < HASH_HEIGHT:
+        raise ValueError(f"thumbnail {width}x{height} is smaller than the hash grid")
+    value = 0
+    for y in range(HASH_HEIGHT):
+        row = rows[y * height // HASH_HEIGHT]
+        row = [row[x * width // HASH_WIDTH] for x in range(HASH_WIDTH)]
+        for left, right in zip(row, row[1:]):
+            value = (value << 1) | (left > right)
+    return value
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+class ScreenshotStore:
+    """Screenshots under one directory, tracked by a small JSON index"""
+
+    INDEX = 'index.json'
+
+    def __init__(self, directory, max_bytes=50 * 1024 * 1024, max_age=3 * 24 * 3600,
+                 clock=time.time):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.clock = clock
+        os.makedirs(directory, exist_ok=True)
+        self.entries = self._load_index()
+        self.skipped_duplicates = 0
+
+    def _load_index(self):
+        try:
+            with open(os.path.join(self.directory, self.INDEX)) as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return []
+        # Drop entries whose file was removed behind our back
+        return [e for e in entries if os.path.exists(os.path.join(self.directory, e["file"]))]
+
+    def _save_index(self):
+        path = os.path.join(self.directory, self.INDEX)
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.entries, f)
+        os.replace(tmp, path)
+
+    def capture(self, driver, name):
+        """Capture the page; returns the stored path, or None if it was a duplicate"""
+        try:
+            return self._capture_cdp(driver, name)
+        except Exception as e:
+            # Non-Chrome driver or DevTools unavailable: plain full-size PNG
+            logging.debug(f"CDP screenshot unavailable ({e}), falling back to PNG")
+            return self.add(name, driver.get_screenshot_as_png(), 'png', None)
+
+    def _capture_cdp(self, driver, name):
+        metrics = driver.execute_cdp_cmd('Page.getLayoutMetrics', {})
+        viewport = metrics.get('cssLayoutViewport') or metrics['layoutViewport']
+        width, height = viewport['clientWidth'], viewport['clientHeight']
+
+        # A thumbnail of about 17x9 is cheap to fetch; skip the full capture if nothing changed.
+        # Scale so both sides cover the hash grid (the +0.5 absorbs Chrome flooring 16.99 to 16)
+        thumb = driver.execute_cdp_cmd('Page.captureScreenshot', {
+            'format': 'png',
+            'clip': {'x': 0, 'y': 0, 'width': width, 'height': height,
+                     'scale': max((HASH_WIDTH + 0.5) / width, (HASH_HEIGHT + 0.5) / height)},
+        })
+        phash = dhash(base64.b64decode(thumb['data']))
+        previous = self._latest_with_name(name)
+        if previous is not None and previous.get("hash") is not None \
+                and hamming(previous["hash"], phash) <= DUPLICATE_DISTANCE:
+            previous["last_access"] = self.clock()
+            self.skipped_duplicates += 1
+            self._save_index()
+            logging.debug(f"📸 Screenshot unchanged, kept {previous['file']}")
+            return None
+
+        shot = driver.execute_cdp_cmd('Page.captureScreenshot', {
+            'format': CAPTURE_FORMAT,
+            'quality': CAPTURE_QUALITY,
+            'clip': {'x': 0, 'y': 0, 'width': width, 'height': height, 'scale': CAPTURE_SCALE},
+        })
+        return self.add(name, base64.b64decode(shot['data']), CAPTURE_FORMAT, phash)
+
+    def _latest_with_name(self, name):
+        for entry in reversed(self.entries):
+            if entry["name"] == name:
+                return entry
+        return None
+
+    def add(self, name, data, ext, phash):
+        now = self.clock()
+        filename = f"{name}_{int(now * 1000)}.{ext}"
+        path = os.path.join(self.directory, filename)
+        with open(path, 'wb') as f:
+            f.write(data)
+        self.entries.append({
+            "file": filename,
+            "name": name,
+            "ts": now,
+            "last_access": now,
+            "bytes": len(data),
+            "hash": phash,
+        })
+        self.enforce_budget()
+        self._save_index()
+        return path
+
+    def enforce_budget(self):
+        """Drop captures older than max_age, then least recently used ones until under max_bytes"""
+        now = self.clock()
+        keep = []
+        for entry in self.entries:
+            if now - entry["ts"] > self.max_age:
+                self._remove(entry)
+            else:
+                keep.append(entry)
+
+        total = sum(e["bytes"] for e in keep)
+        if total > self.max_bytes:
+            for entry in sorted(keep, key=lambda e: e["last_access"]):
+                if total <= self.max_bytes or len(keep) == 1:
+                    break
+                self._remove(entry)
+                keep.remove(entry)
+                total -= entry["bytes"]
+        self.entries = keep
+
+    def _remove(self, entry):
+        try:
+            os.unlink(os.path.join(self.directory, entry["file"]))
+        except OSError:
+            pass
+
+    def latest(self, n=10):
+        """The newest n captures, newest first, straight from the index"""
+        return [dict(e, path=os.path.join(self.directory, e["file"]))
+                for e in reversed(self.entries[-n:])]
+
+    def total_bytes(self):
+        return sum(e["bytes"] for e in self.entries)
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+GRACEFUL SHUTDOWN
+SIGTERM/SIGINT raise ShutdownRequested on the main thread, which breaks out of
+whatever sleep or WebDriver call is in progress. The flag stays set, so code
+that swallows the exception (bare excepts) still stops at its next wait.
+"""
+
+import signal
+import threading
+import time
+
+_requested = threading.Event()
+_requested_at = None
+_requested_by = None
+
+
+class ShutdownRequested(BaseException):
+    """BaseException so `except Exception` recovery paths don't swallow it"""
+
+
+def _handler(signum, frame):
+    global _requested_at, _requested_by
+    if _requested.is_set():
+        return  # already stopping; don't interrupt the cleanup itself
+    _requested_at = time.monotonic()
+    _requested_by = signal.Signals(signum).name
+    _requested.set()
+    # No logging here: the main thread may be holding the log queue's lock
+    raise ShutdownRequested(_requested_by)
+
+
+def install(signals=(signal.SIGTERM, signal.SIGINT)):
+    """Register the handlers; call from the main thread"""
+    for signum in signals:
+        signal.signal(signum, _handler)
+
+
+def requested():
+    return _requested.is_set()
+
+
+def check():
+    """Raise ShutdownRequested if a stop signal has arrived"""
+    if _requested.is_set():
+        raise ShutdownRequested()
+
+
+def reason():
+    """Name of the signal that asked us to stop"""
+    return _requested_by
+
+
+def elapsed():
+    """Seconds since the stop signal, 0.0 if none arrived"""
+    return time.monotonic() - _requested_at if _requested_at is not None else 0.0
@@ -4,31 +4,17 @@ echo "=========================================="
 echo "🚀 FULL ROOT ACCESS VS CODE TERMINAL"
 echo "=========================================="
 
-# Start all services as root
-echo "Starting services..."
-
-# 1. Start SSH
-service ssh start
-echo "✅ SSH (Port 22): root:root123 / coder:coder123"
-
-# 2. Start RDP
-xrdp --nodaemon &
-echo "✅ RDP (Port 3389): User: coder, Password: coder123"
-
-# 3. Start virtual display
-Xvfb :99 -screen 0 1280x720x24 &
-echo "✅ Virtual Display :99 ready"
-
-# 4. Start VNC
-x11vnc -display :99 -forever -shared -rfbport 5900 -passwd coder123 -bg &
-echo "✅ VNC (Port 5900): Password: coder123"
-
-# 5. Start code-server as coder user
-su -c "code-server --bind-addr 0.0.0.0:8080 --auth none" coder &
-echo "✅ VS Code (Port 8080): No password required"
-
-# 6. Start health check server
-python3 -m http.server 8081 --directory /tmp &
+# Services are started by launcher.py below: in parallel, Xvfb before x11vnc,
+# and /health only turns healthy once code-server and the health server answer.
+# Those two run under supervisor.py, which restarts them if they exit.
+#   SSH (Port 22):      root:root123 / coder:coder123
+#   RDP (Port 3389):    User: coder, Password: coder123
+#   Virtual Display :99
+#   VNC (Port 5900):    Password: coder123
+#   VS Code (Port 8080): No password required
+#   Health check (Port 8081)
+# RDP/VNC start on the first connection and stop when idle
+# (DESKTOP_ON_DEMAND=0 keeps them running all the time).
 
 echo ""
 echo "=========================================="
@@ -52,5 +38,5 @@ echo "• MySQL, PostgreSQL, Redis, MongoDB"
 echo "• Nmap, Wireshark, Security tools"
 echo "=========================================="
 
-# Keep container running
-tail -f /dev/null
+# Start everything and keep the container running
+exec python3 "$(dirname "$0")/launcher.py"
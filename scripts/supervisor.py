@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+PROCESS SUPERVISOR
+Owns the automator, code-server and health server; restarts them the moment they exit
+"""
+
+import argparse
+import ctypes
+import json
+import logging
+import os
+import pwd
+import selectors
+import signal
+import socket
+import subprocess
+import sys
+import time
+from collections import deque
+
+from log_setup import setup_logging
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+SOCKET_PATH = '/tmp/vscode-supervisor.sock'
+
+# Restart policy
+BACKOFF_BASE = 1.0         # first restart delay (seconds), doubled per consecutive crash
+BACKOFF_MAX = 60.0
+STABLE_AFTER = 30.0        # a run this long resets the backoff
+CRASH_LOOP_EXITS = 5       # this many exits ...
+CRASH_LOOP_WINDOW = 120.0  # ... within this window is a crash loop
+CRASH_LOOP_HOLD = 300.0    # wait this long before trying again
+STOP_GRACE = 10.0          # SIGTERM -> SIGKILL delay on shutdown
+
+
+SERVICES = {
+    'automator': [sys.executable, os.path.join(SCRIPTS_DIR, 'my_colab_automation.py')],
+    'code-server': ['code-server', '--bind-addr', '0.0.0.0:8080', '--auth', 'none'],
+    'health': [sys.executable, os.path.join(SCRIPTS_DIR, 'health-server.py')],
+}
+# Run as this user when the supervisor is root. The child itself drops privileges:
+# a `su -c` parent would SIGKILL it 2s after forwarding SIGTERM, cutting the
+# automator's shutdown (state snapshot, driver.quit()) short.
+RUN_AS = {'automator': 'coder', 'code-server': 'coder'}
+
+
+class Child:
+    def __init__(self, name, argv):
+        self.name = name
+        self.argv = argv
+        self.pid = None
+        self.process = None  # Popen of a child started as another user
+        self.state = 'stopped'
+        self.started_at = None
+        self.restarts = 0
+        self.consecutive_failures = 0
+        self.recent_exits = deque(maxlen=CRASH_LOOP_EXITS)
+        self.next_start = 0.0
+        self.last_exit = None
+        self.old_group = None  # process group of the previous run, killed before restarting
+
+    def status(self, now):
+        return {
+            "state": self.state,
+            "pid": self.pid,
+            "uptime": round(now - self.started_at, 1) if self.pid else 0,
+            "restarts": self.restarts,
+            "last_exit": self.last_exit,
+            "next_start_in": round(max(0.0, self.next_start - now), 1) if self.pid is None else None,
+        }
+
+
+def become_subreaper():
+    """Orphaned grandchildren (e.g. chromedriver) get reparented to us so we can reap them"""
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        PR_SET_CHILD_SUBREAPER = 36
+        return libc.prctl(PR_SET_CHILD_SUBREAPER, 1, 0, 0, 0) == 0
+    except Exception:
+        return False
+
+
+def describe_status(status):
+    if os.WIFSIGNALED(status):
+        return f"signal {os.WTERMSIG(status)}"
+    return f"exit {os.WEXITSTATUS(status)}"
+
+
+class Supervisor:
+    def __init__(self, children, socket_path=SOCKET_PATH):
+        self.children = {c.name: c for c in children}
+        self.by_pid = {}
+        self.socket_path = socket_path
+        self.selector = selectors.DefaultSelector()
+        self.stopping = False
+
+    # ------------------------------------------------------------------ setup
+    def install_signals(self):
+        """SIGCHLD/SIGTERM/SIGINT wake the select loop through a self-pipe"""
+        self.wake_r, self.wake_w = os.pipe()
+        os.set_blocking(self.wake_r, False)
+        os.set_blocking(self.wake_w, False)
+        signal.set_wakeup_fd(self.wake_w)
+        for sig in (signal.SIGCHLD, signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+            signal.signal(sig, lambda *_: None)
+        self.selector.register(self.wake_r, selectors.EVENT_READ, self.on_signal)
+
+    def open_socket(self):
+        try:
+            os.unlink(self.socket_path)
+        except OSError:
+            pass
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(self.socket_path)
+        self.server.listen(4)
+        self.server.setblocking(False)
+        self.selector.register(self.server, selectors.EVENT_READ, self.on_client)
+
+    # --------------------------------------------------------------- children
+    def start(self, child):
+        if child.old_group:
+            self.kill_group(child.old_group, signal.SIGKILL)
+            child.old_group = None
+        try:
+            pid = self.spawn(child)
+        except (OSError, KeyError) as e:
+            logging.error(f"❌ {child.name}: cannot start: {e}")
+            self.schedule_restart(child, time.monotonic())
+            return
+        if child.started_at is not None:
+            child.restarts += 1
+        child.pid = pid
+        child.state = 'running'
+        child.started_at = time.monotonic()
+        self.by_pid[pid] = child
+        logging.info(f"▶ {child.name} started (pid {pid})")
+
+    def spawn(self, child):
+        """Start child in a new session (own process group, so the whole tree can be signalled at once)"""
+        user = RUN_AS.get(child.name) if os.geteuid() == 0 else None
+        if user is None:
+            return os.posix_spawnp(child.argv[0], child.argv, os.environ, setsid=True)
+        # setgid/setgroups/setuid happen in the forked child right before exec
+        entry = pwd.getpwnam(user)
+        env = dict(os.environ, HOME=entry.pw_dir, USER=user, LOGNAME=user, SHELL=entry.pw_shell)
+        child.process = subprocess.Popen(child.argv, env=env, stdin=subprocess.DEVNULL,
+                                         user=entry.pw_uid, group=entry.pw_gid,
+                                         extra_groups=os.getgrouplist(user, entry.pw_gid),
+                                         start_new_session=True)
+        return child.process.pid
+
+    def kill_group(self, pgid, sig):
+        try:
+            os.killpg(pgid, sig)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    def reap(self):
+        """Collect every exited process: our children and adopted orphans"""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            child = self.by_pid.pop(pid, None)
+            if child is not None:
+                if child.process is not None:
+                    # Reaped here, not by Popen; tell it so it does not wait again
+                    child.process.returncode = os.waitstatus_to_exitcode(status)
+                    child.process = None
+                self.on_exit(child, status)
+
+    def on_exit(self, child, status):
+        now = time.monotonic()
+        ran = now - child.started_at
+        child.last_exit = describe_status(status)
+        # Leftovers in the group (chromedriver, chrome renderers) go with it:
+        # TERM now, KILL whatever is still there when the child is restarted
+        self.kill_group(child.pid, signal.SIGTERM)
+        child.old_group = child.pid
+        child.pid = None
+        logging.warning(f"⚠ {child.name} exited ({child.last_exit}) after {ran:.1f}s",
+                        extra={"event": "child_exit", "step": child.name, "duration": ran})
+        if self.stopping:
+            child.state = 'stopped'
+            return
+        if ran >= STABLE_AFTER:
+            child.consecutive_failures = 0
+        self.schedule_restart(child, now)
+
+    def schedule_restart(self, child, now):
+        child.consecutive_failures += 1
+        child.recent_exits.append(now)
+        if len(child.recent_exits) == CRASH_LOOP_EXITS and now - child.recent_exits[0] <= CRASH_LOOP_WINDOW:
+            child.state = 'crash_loop'
+            delay = CRASH_LOOP_HOLD
+            child.recent_exits.clear()
+            logging.error(f"💀 {child.name} is crash-looping, holding off {delay:.0f}s",
+                          extra={"event": "crash_loop", "step": child.name})
+        else:
+            child.state = 'backoff'
+            delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (child.consecutive_failures - 1))
+        child.next_start = now + delay
+        logging.info(f"🔄 {child.name} restarting in {delay:.1f}s")
+
+    # ------------------------------------------------------------------ loop
+    def on_signal(self):
+        try:
+            data = os.read(self.wake_r, 512)
+        except BlockingIOError:
+            return
+        for signum in data:
+            if signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+                self.stopping = True
+        self.reap()
+
+    def on_client(self):
+        try:
+            conn, _ = self.server.accept()
+        except BlockingIOError:
+            return
+        with conn:
+            conn.settimeout(1.0)
+            try:
+                command = conn.recv(256).decode().split()
+            except (OSError, UnicodeDecodeError):
+                command = []
+            if len(command) == 2 and command[0] == 'restart' and command[1] in self.children:
+                child = self.children[command[1]]
+                if child.pid:
+                    self.kill_group(child.pid, signal.SIGTERM)
+                else:
+                    child.next_start = 0.0
+                reply = {"ok": True}
+            elif len(command) == 2 and command[0] == 'start' and command[1] in SERVICES:
+                # Take on a service this supervisor was not started with (e.g. the automator)
+                if command[1] not in self.children:
+                    self.children[command[1]] = child = Child(command[1], SERVICES[command[1]])
+                    self.start(child)
+                reply = {"ok": True}
+            else:
+                reply = self.status()
+            try:
+                conn.sendall(json.dumps(reply).encode() + b'\n')
+            except OSError:
+                pass
+
+    def status(self):
+        now = time.monotonic()
+        return {name: child.status(now) for name, child in self.children.items()}
+
+    def run(self):
+        become_subreaper()
+        self.install_signals()
+        self.open_socket()
+        for child in self.children.values():
+            self.start(child)
+
+        while not self.stopping:
+            now = time.monotonic()
+            waiting = [c for c in self.children.values() if c.pid is None]
+            for child in waiting:
+                if child.next_start <= now:
+                    self.start(child)
+            pending = [c.next_start - now for c in self.children.values() if c.pid is None]
+            timeout = max(0.0, min(pending)) if pending else None
+            for key, _ in self.selector.select(timeout):
+                key.data()
+
+        self.shutdown()
+
+    def shutdown(self):
+        logging.info("🛑 Stopping all services...")
+        for child in self.children.values():
+            if child.pid:
+                self.kill_group(child.pid, signal.SIGTERM)
+        deadline = time.monotonic() + STOP_GRACE
+        while any(c.pid for c in self.children.values()) and time.monotonic() < deadline:
+            self.selector.select(0.2)
+            self.reap()
+        for child in self.children.values():
+            if child.pid:
+                self.kill_group(child.pid, signal.SIGKILL)
+        self.reap()
+        try:
+            os.unlink(self.socket_path)
+        except OSError:
+            pass
+
+
+def query(command='status', socket_path=SOCKET_PATH):
+    """Send a command to a running supervisor and return its JSON reply"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.settimeout(2.0)
+        conn.connect(socket_path)
+        conn.sendall(command.encode())
+        return json.loads(conn.makefile().readline())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Supervise the container's long-running services")
+    parser.add_argument('services', nargs='*', default=list(SERVICES), help="services to run")
+    parser.add_argument('--status', action='store_true', help="print status of a running supervisor")
+    parser.add_argument('--restart', metavar='SERVICE', help="ask a running supervisor to restart a service")
+    parser.add_argument('--start', metavar='SERVICE', help="ask a running supervisor to also run a service")
+    args = parser.parse_args()
+
+    if args.status or args.restart or args.start:
+        command = f'restart {args.restart}' if args.restart else f'start {args.start}' if args.start else 'status'
+        print(json.dumps(query(command), indent=2))
+        return
+
+    setup_logging('/home/coder/logs/supervisor.log')
+    unknown = [s for s in args.services if s not in SERVICES]
+    if unknown:
+        parser.error(f"unknown services: {', '.join(unknown)}")
+    Supervisor([Child(name, SERVICES[name]) for name in args.services]).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+STATUS TIME SERIES
+Fixed-size ring buffers of (timestamp, value) pairs living in a memory-mapped
+file: the automator writes, the health server reads, and restarts keep history
+"""
+
+import mmap
+import os
+import struct
+import time
+
+# Series the automator records
+SERIES = ('runtime_up', 'check_latency_seconds', 'reconnect_seconds', 'chrome_rss_bytes')
+# Points kept per series; a runtime check every 5 minutes fills this in ~2 weeks
+CAPACITY = 4096
+
+MAGIC = b'TSRING01'
+HEADER = struct.Struct('<8sII')         # magic, series count, capacity
+SERIES_HEADER = struct.Struct('<32sQ')  # name, total points ever written
+POINT = struct.Struct('<dd')            # timestamp, value
+
+
+class TimeSeriesStore:
+    def __init__(self, path, series=SERIES, capacity=CAPACITY, readonly=False):
+        """
+        A writer creates (or recreates, if the layout changed) the file;
+        a reader maps whatever the writer left and raises OSError if it is missing
+        """
+        self.path = path
+        self.readonly = readonly
+        if readonly:
+            with open(path, 'rb') as f:
+                self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, count, self.capacity = HEADER.unpack_from(self.mm, 0)
+            if magic != MAGIC:
+                raise OSError(f"{path}: not a time series file")
+            self.series = tuple(
+                SERIES_HEADER.unpack_from(self.mm, HEADER.size + i * SERIES_HEADER.size)[0]
+                .rstrip(b'\0').decode() for i in range(count))
+            if len(self.mm) != self._size():
+                raise OSError(f"{path}: truncated time series file")
+        else:
+            self.series = tuple(series)
+            self.capacity = capacity
+            self.mm = self._open_writable()
+        self.index = {name: i for i, name in enumerate(self.series)}
+        self.data_offset = HEADER.size + len(self.series) * SERIES_HEADER.size
+
+    def _size(self):
+        return HEADER.size + len(self.series) * (SERIES_HEADER.size + self.capacity * POINT.size)
+
+    def _open_writable(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        size = self._size()
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size == size and self._layout_matches(fd):
+                return mmap.mmap(fd, size)
+            # New file or a different layout: start empty
+            os.ftruncate(fd, 0)
+            os.ftruncate(fd, size)
+            mm = mmap.mmap(fd, size)
+            HEADER.pack_into(mm, 0, MAGIC, len(self.series), self.capacity)
+            for i, name in enumerate(self.series):
+                SERIES_HEADER.pack_into(mm, HEADER.size + i * SERIES_HEADER.size, name.encode(), 0)
+            return mm
+        finally:
+            os.close(fd)
+
+    def _layout_matches(self, fd):
+        head = os.pread(fd, HEADER.size + len(self.series) * SERIES_HEADER.size, 0)
+        if HEADER.unpack_from(head, 0) != (MAGIC, len(self.series), self.capacity):
+            return False
+        return all(SERIES_HEADER.unpack_from(head, HEADER.size + i * SERIES_HEADER.size)[0]
+                   .rstrip(b'\0').decode() == name for i, name in enumerate(self.series))
+
+    # ----------------------------------------------------------------- write
+    def _written(self, i):
+        return SERIES_HEADER.unpack_from(self.mm, HEADER.size + i * SERIES_HEADER.size)[1]
+
+    def _point_offset(self, i, slot):
+        return self.data_offset + (i * self.capacity + slot) * POINT.size
+
+    def record(self, name, value, ts=None):
+        """Overwrite the oldest point of `name`; constant memory however long we run"""
+        i = self.index[name]
+        written = self._written(i)
+        POINT.pack_into(self.mm, self._point_offset(i, written % self.capacity),
+                        time.time() if ts is None else ts, float(value))
+        # Bump the counter last so a reader never sees a half-written point as new
+        SERIES_HEADER.pack_into(self.mm, HEADER.size + i * SERIES_HEADER.size,
+                                name.encode(), written + 1)
+
+    def flush(self):
+        self.mm.flush()
+
+    def close(self):
+        if not self.readonly:
+            self.mm.flush()
+        self.mm.close()
+
+    # ------------------------------------------------------------------ read
+    def points(self, name, since=0.0):
+        """(timestamp, value) pairs newer than `since`, oldest first"""
+        i = self.index[name]
+        written = self._written(i)
+        result = []
+        # Walk back from the newest point and stop at the first one that is too old
+        for n in range(written - 1, max(-1, written - 1 - self.capacity), -1):
+            ts, value = POINT.unpack_from(self.mm, self._point_offset(i, n % self.capacity))
+            if ts < since:
+                break
+            result.append((ts, value))
+        result.reverse()
+        return result
+
+    def downsample(self, name, window, step, now=None):
+        """min/max/avg of `name` per `step` seconds over the last `window` seconds"""
+        now = time.time() if now is None else now
+        start = now - window
+        buckets = {}
+        for ts, value in self.points(name, since=start):
+            key = int((ts - start) // step)
+            bucket = buckets.get(key)
+            if bucket is None:
+                buckets[key] = [value, value, value, 1]
+            else:
+                bucket[0] = min(bucket[0], value)
+                bucket[1] = max(bucket[1], value)
+                bucket[2] += value
+                bucket[3] += 1
+        return [{"t": round(start + key * step, 3), "min": lo, "max": hi,
+                 "avg": round(total / count, 6), "count": count}
+                for key, (lo, hi, total, count) in sorted(buckets.items())]
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+CONDITION WAITS
+Poll a condition with backoff until it holds or a per-step deadline passes
+"""
+
+import logging
+import time
+
+import shutdown
+
+
+def wait_for(condition, timeout, step, initial_interval=0.1, max_interval=2.0,
+             backoff=1.5, clock=None, sleep=None):
+    """
+    Call condition() until it returns something truthy or timeout seconds pass.
+    Exceptions from condition() count as "not yet". Returns the truthy value,
+    or None on timeout. The elapsed time is logged under the step name.
+    clock/sleep default to time.monotonic/time.sleep, looked up at call time.
+    Raises shutdown.ShutdownRequested once a stop signal has arrived.
+    """
+    clock = clock or time.monotonic
+    sleep = sleep or time.sleep
+    start = clock()
+    deadline = start + timeout
+    interval = initial_interval
+    attempts = 0
+
+    while True:
+        shutdown.check()
+        attempts += 1
+        try:
+            value = condition()
+        except Exception:
+            value = None
+        now = clock()
+        if value:
+            logging.info(f"⏱ {step}: ready in {now - start:.2f}s ({attempts} checks)",
+                         extra={"event": "step", "step": step, "duration": now - start})
+            return value
+        if now >= deadline:
+            logging.warning(f"⏱ {step}: not ready after {now - start:.2f}s ({attempts} checks)",
+                            extra={"event": "step_timeout", "step": step, "duration": now - start})
+            return None
+        sleep(min(interval, deadline - now))
+        interval = min(interval * backoff, max_interval)